@@ -0,0 +1,65 @@
+# %%
+# Timings and equivalence of the Horner-form UNESCO formulas ("EC_to_S", "S_to_rho")
+# against the original formulas, on an hourly x well array.
+# Run from the repository root: python -m benchmarks.density
+import timeit
+
+import numpy as np
+
+from benchmarks import reference
+from groundwater_ijmuiden import helper_functions
+
+rng = np.random.default_rng(0)
+shape = (23000, 100)
+ec = rng.uniform(0.05, 60, shape)
+temperature = rng.uniform(0, 30, shape)
+pressure = rng.uniform(0, 100, shape)
+
+# %% equivalence, relative for the salinity and absolute (kg/m3) for the density
+for t, p in [(20, 10), (temperature, 10), (temperature, pressure)]:
+    expected = reference.ec_to_s(ec, t, p)
+    error = np.max(
+        np.abs(helper_functions.EC_to_S(ec, t, p) - expected) / np.abs(expected)
+    )
+    print(f"EC_to_S relative error: {error:.1e}")
+    assert error < 1e-13
+
+salinity = reference.ec_to_s(ec, 20, 10)
+expected = reference.s_to_rho(salinity, temperature)
+error = np.max(np.abs(helper_functions.S_to_rho(salinity, temperature) - expected))
+print(f"S_to_rho error: {error:.1e} kg/m3")
+assert error < 1e-11
+
+error = np.max(
+    np.abs(
+        helper_functions.S_to_rho(
+            helper_functions.EC_to_S(ec.astype(np.float32), 20, 10),
+            temperature.astype(np.float32),
+        )
+        - expected
+    )
+)
+print(f"S_to_rho float32 error: {error:.1e} kg/m3")
+assert error < 1e-3
+
+# %% timings (best of 3)
+salinity32, temperature32 = salinity.astype(np.float32), temperature.astype(np.float32)
+for name, function in [
+    ("EC_to_S reference", lambda: reference.ec_to_s(ec, 20, 10)),
+    ("EC_to_S", lambda: helper_functions.EC_to_S(ec, 20, 10)),
+    ("S_to_rho reference", lambda: reference.s_to_rho(salinity, temperature)),
+    ("S_to_rho", lambda: helper_functions.S_to_rho(salinity, temperature)),
+    ("S_to_rho float32", lambda: helper_functions.S_to_rho(salinity32, temperature32)),
+]:
+    seconds = min(timeit.repeat(function, number=1, repeat=3))
+    print(f"{name}: {1000 * seconds:.0f} ms")
+
+# %% the optional lookup table (DensityTable), its maximum error and lookup time
+for table, x in [
+    (helper_functions.DensityTable.salinity(), salinity),
+    (helper_functions.DensityTable.conductivity(), ec),
+]:
+    print(f"DensityTable max_error: {table.max_error:.1e} kg/m3")
+    assert table.max_error < 1.1e-4
+    seconds = min(timeit.repeat(lambda: table(x, temperature), number=1, repeat=3))
+    print(f"DensityTable lookup: {1000 * seconds:.0f} ms")
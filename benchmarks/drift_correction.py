@@ -0,0 +1,43 @@
+# %%
+# Checks of the "drift" compensation: one bad handreading in a short segment does not
+# tilt the segment, and a realistic drift is still fitted.
+import pandas as pd
+
+import groundwater_ijmuiden as gij
+
+starts = pd.to_datetime(["01-01-2022", "01-01-2023"], format="%d-%m-%Y")
+
+
+def readings(dates, differences) -> pd.DataFrame:
+    return pd.DataFrame(
+        {"well_id": "W1", "date": pd.to_datetime(dates), "difference": differences}
+    )
+
+
+# %% a short segment of three readings, the last one 0.5 m off
+outlier = readings(
+    [
+        "2022-02-01",
+        "2022-06-01",
+        "2022-10-01",
+        "2023-01-10",
+        "2023-02-10",
+        "2023-03-25",
+    ],
+    [0.05, 0.051, 0.049, 0.12, 0.121, 0.62],
+)
+parameters = gij.DriftCorrection().fit(outlier, {"W1": starts})
+print(parameters)
+assert parameters["drift"].abs().max() < 0.05, "drift above 5 cm/year"
+
+# %% two readings in the short segment: an offset without drift
+parameters = gij.DriftCorrection().fit(outlier.drop(index=4), {"W1": starts})
+print(parameters)
+assert parameters["drift"].iloc[1] == 0
+
+# %% a drift of 1 cm/year over three years
+dates = pd.date_range("2022-01-15", "2024-12-15", periods=6)
+drifting = readings(dates, 0.05 + 0.01 * (dates - dates[0]).days / 365.25)
+parameters = gij.DriftCorrection().fit(drifting, {"W1": starts[:1]})
+print(parameters)
+assert abs(parameters["drift"].iloc[0] - 0.01) < 0.001
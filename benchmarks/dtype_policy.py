@@ -0,0 +1,43 @@
+# %%
+# Precision and memory of the float32 dtype policy of MonitoringWell against float64.
+# Run from the repository root: python -m benchmarks.dtype_policy
+import numpy as np
+
+from benchmarks.synthetic import monitoring_wells
+
+n_wells = 10
+wells = {dtype: monitoring_wells(n_wells, dtype) for dtype in ["float64", "float32"]}
+
+# %% heads in m NAP, float32 within 1e-4 m of float64
+for name in ["point_water_head", "fresh_water_head", "fresh_water_ref_head"]:
+    difference = max(
+        np.nanmax(
+            np.abs(
+                getattr(a, name).iloc[:, 0].to_numpy(np.float64)
+                - getattr(b, name).iloc[:, 0].to_numpy(np.float64)
+            )
+        )
+        for a, b in zip(wells["float64"], wells["float32"])
+    )
+    print(f"{name}: max difference {difference:.1e} m")
+    assert difference < 1e-4
+
+# %% memory of the stored series per well
+for dtype, group in wells.items():
+    memory = np.mean(
+        [
+            sum(
+                frame.memory_usage(index=False).sum()
+                for frame in [
+                    well.diver_data,
+                    well.barometer_data,
+                    well.water_density,
+                    well.point_water_head,
+                    well.fresh_water_head,
+                    well.fresh_water_ref_head,
+                ]
+            )
+            for well in group
+        ]
+    )
+    print(f"{dtype}: {memory / 1e6:.2f} MB per well")
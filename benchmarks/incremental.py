@@ -0,0 +1,120 @@
+# %%
+# Timings and equivalence of the incremental processing (IncrementalProcessor) against
+# processing the full record, for a sequence of runs with appended data, a new field
+# campaign, a changed month in the past and a geometry change.
+# Run from the repository root: python -m benchmarks.incremental
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+import groundwater_ijmuiden as gij
+
+kinds = ["point_water_head", "fresh_water_head", "fresh_water_ref_head"]
+rng = np.random.default_rng(3)
+dates = pd.date_range("2022-05-01", "2024-12-31", freq="h")
+barometer = pd.DataFrame(
+    {"air_pressure (mH2O)": 10.3 + rng.normal(0, 0.05, len(dates))}, index=dates
+)
+pressure = 23 + rng.normal(0, 0.3, len(dates))
+pressure[rng.integers(0, len(dates), 30)] = 40
+diver_data = pd.DataFrame(
+    {
+        "temperature (degC)": 11 + rng.normal(0, 0.1, len(dates)),
+        "diver_pressure (mH2O)": pressure,
+    },
+    index=dates,
+)
+diver_data = diver_data.drop(diver_data.index[rng.integers(0, len(dates), 400)])
+campaigns = pd.to_datetime(
+    ["09082022", "07022023", "23052023", "19092023", "23012024", "10042024"]
+    + ["22052024", "10102024", "02122024"],
+    format="%d%m%Y",
+)
+ec_measurements = pd.DataFrame(
+    {"electrical_conductivity (mS/cm)": rng.uniform(1, 40, len(campaigns))},
+    index=campaigns,
+)
+gw_measurements = pd.DataFrame(
+    {"head (m-ztop)": rng.uniform(1.4, 1.8, len(campaigns))},
+    index=campaigns + pd.Timedelta(hours=10),
+)
+
+
+def build(
+    dtype: str,
+    end_date: str,
+    n_campaigns: int,
+    changed_month: str | None = None,
+    ztop_change: str | None = None,
+) -> gij.MonitoringWell:
+    """
+    The well with the data up to "end_date", the first "n_campaigns" campaigns, the diver
+    pressure of "changed_month" ("yyyy-mm") raised by 5 cm and a new ztop from
+    "ztop_change" ("dd-mm-yyyy").
+    """
+    well = gij.MonitoringWell(
+        "W1", -15, 1.5, 20, 25, "20-05-2022", end_date, dtype=dtype
+    )
+    end = pd.to_datetime(end_date, format="%d-%m-%Y")
+    well.add_barometer(barometer.loc[:end])
+    diver = diver_data.loc[:end].copy()
+    if changed_month is not None:
+        diver.loc[changed_month, "diver_pressure (mH2O)"] += 0.05
+    well.add_diverdata(diver)
+    well.update_properties("01-03-2023", new_cable_length=20.5)
+    if ztop_change is not None:
+        well.update_properties(ztop_change, new_ztop=1.6)
+    well.add_ec_measurements(ec_measurements.iloc[:n_campaigns])
+    well.add_gw_measurements(gw_measurements.iloc[:n_campaigns])
+    return well
+
+
+runs = [
+    ("initial", dict(end_date="01-07-2024", n_campaigns=7)),
+    ("unchanged", dict(end_date="01-07-2024", n_campaigns=7)),
+    ("appended data", dict(end_date="01-09-2024", n_campaigns=7)),
+    ("new campaign", dict(end_date="01-11-2024", n_campaigns=8)),
+    (
+        "changed past month",
+        dict(end_date="01-11-2024", n_campaigns=8, changed_month="2024-02"),
+    ),
+    (
+        "geometry change",
+        dict(
+            end_date="05-12-2024",
+            n_campaigns=9,
+            changed_month="2024-02",
+            ztop_change="01-09-2024",
+        ),
+    ),
+]
+
+# %% the incremental heads equal the heads of the full record exactly
+for dtype in ["float64", "float32"]:
+    for match, method in [
+        (False, "last"),
+        (True, "last"),
+        (True, "penultimate"),
+        (True, "all"),
+    ]:
+        processor = gij.IncrementalProcessor(tempfile.mkdtemp())
+        for label, kwargs in runs:
+            well = build(dtype, **kwargs)
+            start = time.perf_counter()
+            first = processor.process(well, match, method)
+            seconds = time.perf_counter() - start
+
+            full = build(dtype, **kwargs)
+            full.barometric_compensation(match, method)
+            for kind in kinds:
+                assert np.array_equal(
+                    getattr(well, kind).to_numpy(),
+                    getattr(full, kind).to_numpy(),
+                    equal_nan=True,
+                ), (dtype, match, method, label, kind)
+            print(
+                f"{dtype} {method if match else 'no matching'}, {label}: identical, "
+                f"recomputed from {first} in {1000 * seconds:.0f} ms"
+            )
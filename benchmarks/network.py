@@ -0,0 +1,51 @@
+# %%
+# Timings and equivalence of the heads of a MonitoringNetwork (all wells at once) against
+# the barometric compensation per well, for float64 and float32.
+# Run from the repository root: python -m benchmarks.network
+import copy
+import time
+
+import numpy as np
+
+import groundwater_ijmuiden as gij
+from benchmarks.synthetic import monitoring_wells
+
+n_wells = 40
+kinds = ["point_water_head", "fresh_water_head", "fresh_water_ref_head"]
+
+# %% the heads of the network equal the heads per well exactly
+for dtype in ["float64", "float32"]:
+    wells = monitoring_wells(n_wells, dtype, compensate=False)
+    for match, method in [
+        (False, "last"),
+        (True, "last"),
+        (True, "penultimate"),
+        (True, "all"),
+    ]:
+        per_well = copy.deepcopy(wells)
+        start = time.perf_counter()
+        for well in per_well:
+            well.barometric_compensation(match, method)
+            for kind in kinds:  # the heads of a well are computed on access
+                getattr(well, kind)
+        seconds_per_well = time.perf_counter() - start
+
+        network = gij.MonitoringNetwork(copy.deepcopy(wells))
+        start = time.perf_counter()
+        network.barometric_compensation(match, method)
+        seconds_network = time.perf_counter() - start
+
+        for kind in kinds:
+            heads = network.heads(kind)
+            for well in per_well:
+                expected = getattr(well, kind).iloc[:, 0]
+                assert np.array_equal(
+                    heads[well.well_id].loc[well.date_range].to_numpy(),
+                    expected.to_numpy(),
+                    equal_nan=True,
+                ), (dtype, match, method, kind, well.well_id)
+        label = f"{dtype} {method if match else 'no matching'}"
+        print(
+            f"{label}: identical, per well {seconds_per_well:.2f} s, "
+            f"network {seconds_network:.2f} s"
+        )
@@ -0,0 +1,31 @@
+# %%
+# Timings and equivalence of the DiverOffice readers against the original python engine
+# reader (header-aware C/pyarrow parsing and the timestamp decoding from the file bytes).
+# Run from the repository root: python -m benchmarks.readers
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+
+import groundwater_ijmuiden as gij
+from benchmarks import reference
+from benchmarks.synthetic import write_diveroffice
+
+n_rows = 1_000_000
+directory = Path(tempfile.mkdtemp())
+
+# %%
+for name, barometer in [("read_diver", False), ("read_barometer", True)]:
+    path = directory / f"{name}.csv"
+    write_diveroffice(path, n_rows, barometer=barometer)
+
+    start = time.perf_counter()
+    expected = getattr(reference, name)(path)
+    print(f"{name} reference: {time.perf_counter() - start:.2f} s")
+
+    for engine in ["c", "pyarrow"]:
+        start = time.perf_counter()
+        df = getattr(gij, name)(path, engine=engine)
+        print(f"{name} {engine}: {time.perf_counter() - start:.2f} s")
+        pd.testing.assert_frame_equal(df, expected, check_exact=True)
@@ -0,0 +1,94 @@
+"""
+The original (unoptimised) readers and density formulas, the reference of the
+equivalence checks in this folder.
+"""
+
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+
+def read_diver(path: str | Path) -> pd.DataFrame:
+    df = pd.read_csv(
+        path,
+        usecols=[0, 1, 2],
+        names=["date", "diver_pressure (cmH2O)", "temperature (degC)"],
+        decimal=",",
+        skiprows=52,
+        delimiter=";",
+        encoding="ISO-8859-1",
+        engine="python",
+    )
+    df = df[:-1].replace("     ", np.nan)
+    df["diver_pressure (mH2O)"] = pd.to_numeric(df["diver_pressure (cmH2O)"]) / 100
+    df = df.drop(columns=["diver_pressure (cmH2O)"])
+    df["temperature (degC)"] = pd.to_numeric(df["temperature (degC)"])
+    df["date"] = pd.to_datetime(df["date"], format="%Y/%m/%d %H:%M:%S")
+    df = df.set_index("date")
+    return df
+
+
+def read_barometer(path: str | Path) -> pd.DataFrame:
+    df = pd.read_csv(
+        path,
+        usecols=[0, 1],
+        names=["date", "air_pressure (cmH2O)"],
+        decimal=",",
+        skiprows=52,
+        delimiter=";",
+        encoding="ISO-8859-1",
+        engine="python",
+    )
+    df = df[:-1].replace("     ", np.nan)
+    df["air_pressure (mH2O)"] = pd.to_numeric(df["air_pressure (cmH2O)"]) / 100
+    df = df.drop(columns=["air_pressure (cmH2O)"])
+    df["date"] = pd.to_datetime(df["date"], format="%Y/%m/%d %H:%M:%S")
+    df = df.set_index("date")
+    return df
+
+
+def ec_to_s(ec, t, p):
+    """The salinity (psu) from EC (mS/cm), temperature (°C) and pressure (dbar)."""
+    r = ec / 42.914
+    a = [0.008, -0.1692, 25.3851, 14.0941, -7.0261, 2.7081]  # a0 - a5
+    b = [0.0005, -0.0056, -0.0066, -0.0375, 0.0636, -0.0144]  # b0 - b5
+    c = [0.6766097, 2.00564e-2, 1.104259e-4, -6.9698e-7, 1.0031e-9]  # c0 - c4
+    d = [3.426e-2, 4.4464e-4, 4.215e-1, -3.107e-3]  # d1 - d4
+    e = [2.070e-5, -6.370e-10, 3.989e-15]  # e1 - e3
+
+    rt = sum(c[i] * t**i for i in range(len(c)))
+    rp = 1 + (p * (e[0] + e[1] * p + e[2] * p**2)) / (
+        1 + d[0] * t + d[1] * t**2 + (d[2] + d[3] * t) * r
+    )
+    r_t = r / (rp * rt)
+    return sum(
+        (a[i] + b[i] * (t - 15.0) / (1 + 0.0162 * (t - 15.0))) * (r_t ** (i / 2.0))
+        for i in range(len(a))
+    )
+
+
+def s_to_rho(s, t):
+    """The density (kg/m3) from salinity (psu) and temperature (°C)."""
+    a = [
+        999.842594,
+        6.793652 * 10**-2,
+        -9.095290 * 10**-3,
+        1.001685 * 10**-4,
+        -1.120083 * 10**-6,
+        6.536332 * 10**-9,
+    ]
+    b = [
+        8.24493 * 10**-1,
+        -4.0899 * 10**-3,
+        7.6438 * 10**-5,
+        -8.2467 * 10**-7,
+        5.3875 * 10**-9,
+    ]
+    c = [-5.72466 * 10**-3, 1.0227 * 10**-4, -1.6545 * 10**-6]
+    d = 4.8314 * 10**-4
+
+    rho_f = sum(ai * t**i for i, ai in enumerate(a))
+    term2 = sum(bi * t**i for i, bi in enumerate(b))
+    term3 = sum(ci * t**i for i, ci in enumerate(c))
+    return rho_f + term2 * s + term3 * s**1.5 + d * s**2
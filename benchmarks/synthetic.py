@@ -0,0 +1,100 @@
+"""
+Synthetic DiverOffice files and monitoring wells for the benchmarks in this folder.
+"""
+
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+import groundwater_ijmuiden as gij
+
+
+def write_diveroffice(
+    path: str | Path, n_rows: int, barometer: bool = False, seed: int = 0
+):
+    """
+    Write a DiverOffice csv file with a 52 line header, hourly rows (some with blank
+    values) and the closing footer line.
+    """
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range("2000-01-01", periods=n_rows, freq="h")
+    pressure = np.char.replace(
+        np.char.mod("%10.3f", 1030 + rng.normal(0, 5, n_rows)), ".", ","
+    )
+    temperature = np.char.replace(
+        np.char.mod("%10.3f", 10 + rng.normal(0, 1, n_rows)), ".", ","
+    )
+    pressure[5::997] = "     "
+    temperature[7::1499] = "     "
+    columns = [dates.strftime("%Y/%m/%d %H:%M:%S").to_numpy(dtype=str), pressure]
+    if not barometer:
+        columns.append(temperature)
+
+    header = ["Data file for DataLogger.", "=" * 78]
+    header += [f"KEY_{i:02d}     : value {i}" for i in range(len(header), 50)]
+    header += ["[Data]", f"{n_rows:>10}"]
+    rows = np.char.add(columns[0], np.char.add(";", columns[1]))
+    if not barometer:
+        rows = np.char.add(rows, np.char.add(";", columns[2]))
+    lines = header + rows.tolist() + ["END OF DATA FILE OF DATALOGGER FOR WINDOWS"]
+    Path(path).write_text("\r\n".join(lines) + "\r\n", encoding="ISO-8859-1")
+
+
+def monitoring_wells(
+    n_wells: int, dtype: str = "float64", seed: int = 42, compensate: bool = True
+) -> list[gij.MonitoringWell]:
+    """
+    Wells of about 2.5 years of hourly data (with different start dates and missing
+    samples), with geometry changes, EC measurements and handreadings. If "compensate",
+    they are compensated with the handreadings ("all").
+    """
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range("2022-05-01", "2024-12-31", freq="h")
+    barometer = pd.DataFrame(
+        {"air_pressure (mH2O)": 10.3 + rng.normal(0, 0.005, len(dates))}, index=dates
+    )
+    campaigns = pd.to_datetime(
+        ["09082022", "07022023", "23052023", "19092023", "23012024", "22052024"],
+        format="%d%m%Y",
+    )
+    wells = []
+    for k in range(n_wells):
+        well = gij.MonitoringWell(
+            f"W{k}",
+            -15 - k,
+            1.5,
+            20.0,
+            25.0,
+            f"{20 + k % 7}-05-2022",
+            "05-12-2024",
+            dtype=dtype,
+        )
+        well.add_barometer(barometer)
+        diver_data = pd.DataFrame(
+            {
+                "temperature (degC)": 11 + rng.normal(0, 0.1, len(dates)),
+                "diver_pressure (mH2O)": 23.3 + rng.normal(0, 0.01, len(dates)),
+            },
+            index=dates,
+        )
+        well.add_diverdata(
+            diver_data.drop(diver_data.index[rng.integers(0, len(dates), 200)])
+        )
+        well.update_properties("01-03-2023", new_cable_length=20.5)
+        well.add_ec_measurements(
+            pd.DataFrame(
+                {"electrical_conductivity (mS/cm)": rng.uniform(1, 40, len(campaigns))},
+                index=campaigns,
+            )
+        )
+        well.add_gw_measurements(
+            pd.DataFrame(
+                {"head (m-ztop)": rng.uniform(1.4, 1.8, len(campaigns))},
+                index=campaigns + pd.Timedelta(hours=10),
+            )
+        )
+        if compensate:
+            well.barometric_compensation(match_gw_measurements=True, method="all")
+        wells.append(well)
+    return wells
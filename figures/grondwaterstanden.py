@@ -5,6 +5,8 @@ import pandas as pd
 from matplotlib.lines import Line2D
 from shapely.geometry import Point
 
+import groundwater_ijmuiden as gij
+
 # %%
 water = gpd.read_file(
     r"N:/Projects/11207500/11207510/F. Other information/gis-layers/Structuurvisie__Grote_wateren.shp"
@@ -21,33 +23,29 @@ land = gpd.read_file(
     r"N:/Projects/11207500/11207510/F. Other information/gis-layers/land.shp"
 )
 
+heads = gij.HeadStore(
+    r"N:/Projects/11207500/11207510/B. Measurements and calculations/03_divers/head_store"
+)
+stored = heads.well_ids
+
 names = ["A", "RWS-B26", "C", "E"]
 fig, axs = plt.subplots(
     nrows=1, ncols=4, dpi=400, figsize=(26, 11.69 / 2.5), sharey=True, sharex=True
 )
 
 for ax, name in zip(axs.ravel(), names):
-    fp = pd.read_csv(
-        f"N:/Projects/11207500/11207510/B. Measurements and calculations/03_divers/zoetwaterstijghoogte/{name}_1.csv",
-        index_col=0,
-        parse_dates=[0],
-    )
-    wvp1 = pd.read_csv(
-        f"N:/Projects/11207500/11207510/B. Measurements and calculations/03_divers/zoetwaterstijghoogte/{name}_2.csv",
-        index_col=0,
-        parse_dates=[0],
-    )
+    # the heads of all filters of the well in one read
+    filters = [f"{name}_{i}" for i in (1, 2, 3) if f"{name}_{i}" in stored]
+    daily = heads.read(filters).resample("D").mean()
+    fp = daily[[f"{name}_1"]]
+    wvp1 = daily[[f"{name}_2"]]
 
-    try:
-        wvp2 = pd.read_csv(
-            f"N:/Projects/11207500/11207510/B. Measurements and calculations/03_divers/zoetwaterstijghoogte/{name}_3.csv",
-            index_col=0,
-            parse_dates=[0],
-        )
+    if f"{name}_3" in filters:
+        wvp2 = daily[[f"{name}_3"]]
 
-        fp.resample("D").mean().plot(ax=ax, color="black")
-        wvp1.resample("D").mean().plot(ax=ax, color="maroon")
-        wvp2.resample("D").mean().plot(ax=ax, color="navy")
+        fp.plot(ax=ax, color="black")
+        wvp1.plot(ax=ax, color="maroon")
+        wvp2.plot(ax=ax, color="navy")
         legend_handles = [
             Line2D([0], [0], color="black", label="Freatisch pakket"),
             Line2D([0], [0], color="maroon", label="1e watervoerende pakket"),
@@ -64,10 +62,10 @@ for ax, name in zip(axs.ravel(), names):
         ax.spines.right.set_visible(False)
         ax.spines.top.set_visible(False)
 
-    except FileNotFoundError:
+    else:
 
-        fp.resample("D").mean().plot(ax=ax, color="black")
-        wvp1.resample("D").mean().plot(ax=ax, color="maroon")
+        fp.plot(ax=ax, color="black")
+        wvp1.plot(ax=ax, color="maroon")
         legend_handles = [
             Line2D([0], [0], color="black", label="Freatisch pakket"),
             Line2D([0], [0], color="maroon", label="1e watervoerende pakket"),
@@ -94,25 +92,18 @@ geometry = [Point(xy) for xy in zip(metadata["X-coord"], metadata["Y-coord"])]
 gdf = gpd.GeoDataFrame(metadata, crs="EPSG:28992", geometry=geometry).set_index(
     "Peilbuis"
 )
-for i, row in gdf.iterrows():
-    name = i
-
-    if name in [
-        "B25A0942_3_extra",
-        "B25A0942_5_extra",
-        "B25A0942_6_extra",
-        "B25A0942_7_extra",
-        "Z13PB600_1_extra",
-        "D_2",
-        "RWS-04-1_1",
-        "RWS-04-4_2",
-    ]:
-        continue
-    else:
-        data = pd.read_csv(
-            f"N:/Projects/11207500/11207510/B. Measurements and calculations/03_divers/zoetwaterstijghoogte/{name}.csv"
-        )
-        gdf.loc[i, "fwh"] = data["fresh_water_head (m NAP)"].mean()
+excluded = [
+    "B25A0942_3_extra",
+    "B25A0942_5_extra",
+    "B25A0942_6_extra",
+    "B25A0942_7_extra",
+    "Z13PB600_1_extra",
+    "D_2",
+    "RWS-04-1_1",
+    "RWS-04-4_2",
+]
+names = [name for name in gdf.index if name not in excluded]
+gdf.loc[names, "fwh"] = heads.summary(names)["mean"]
 
 
 markersize = 10
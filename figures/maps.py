@@ -9,6 +9,8 @@ import pyproj
 from shapely.geometry import Point
 from sklearn.linear_model import LinearRegression
 
+import groundwater_ijmuiden as gij
+
 
 def to_chloride_from(electrical_conductivity):
     """
@@ -107,18 +109,9 @@ ax.set_title("Relatie EC en Chloride-concentratie", fontweight="bold", size=10)
 data = metadata[["X-coord", "Y-coord"]]
 data = data.join(handmetingen[["electrical_conductivity [µS/cm]"]])
 data = data.join(bemonstering[["Chloride"]])
-for peilbuis_id in data.index.to_list():
-    try:
-        fresh_water_head = pd.read_csv(
-            path_mc.joinpath(f"03_divers/zoetwaterstijghoogte/{peilbuis_id}.csv"),
-            parse_dates=True,
-            index_col=0,
-        )
-        data.loc[peilbuis_id, "mean_fresh_water_head (m NAP)"] = fresh_water_head[
-            "fresh_water_head (m NAP)"
-        ].mean()
-    except FileNotFoundError:
-        continue
+heads = gij.HeadStore(path_mc.joinpath("03_divers/head_store"))
+stored = data.index.intersection(heads.well_ids)
+data.loc[stored, "mean_fresh_water_head (m NAP)"] = heads.summary(stored)["mean"]
 
 src_crs = pyproj.CRS("EPSG:28992")
 target_crs = pyproj.CRS("EPSG:3857")
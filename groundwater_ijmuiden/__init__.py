@@ -1,10 +1,37 @@
 import groundwater_ijmuiden
+import groundwater_ijmuiden.alignment
+import groundwater_ijmuiden.cache
+import groundwater_ijmuiden.drift_correction
+import groundwater_ijmuiden.exports
+import groundwater_ijmuiden.gaps
+import groundwater_ijmuiden.head_store
 import groundwater_ijmuiden.helper_functions
+import groundwater_ijmuiden.incremental
+import groundwater_ijmuiden.monitoring_network
+import groundwater_ijmuiden.outlier_filters
 import groundwater_ijmuiden.readers
+from groundwater_ijmuiden.alignment import Alignment
+from groundwater_ijmuiden.cache import ReaderCache
 from groundwater_ijmuiden.diver_processing import MonitoringWell
+from groundwater_ijmuiden.drift_correction import DriftCorrection
+from groundwater_ijmuiden.gaps import GapIndex
+from groundwater_ijmuiden.head_store import HeadStore
+from groundwater_ijmuiden.incremental import IncrementalProcessor
+from groundwater_ijmuiden.monitoring_network import MonitoringNetwork
+from groundwater_ijmuiden.outlier_filters import (
+    HampelRule,
+    MinimumRule,
+    OutlierFilter,
+    SpikeRule,
+    ZScoreRule,
+)
 from groundwater_ijmuiden.readers import (
+    iter_diver_chunks,
+    property_changes_from_metadata,
     read_barometer,
     read_diver,
+    read_divers,
+    read_ec_campaigns,
     read_ec_measurement,
     read_gw_measurements,
 )
@@ -0,0 +1,249 @@
+import numpy as np
+import pandas as pd
+
+_METHODS = ("exact", "nearest", "backward", "forward")
+_NO_MATCH = np.iinfo(np.int64).max
+
+
+def _to_ns(index: pd.DatetimeIndex | np.ndarray) -> np.ndarray:
+    """
+    The timestamps as int64 nanoseconds since the epoch (without a copy for a ns index).
+    """
+    return np.asarray(pd.DatetimeIndex(index).as_unit("ns").asi8)
+
+
+class Alignment:
+
+    def __init__(
+        self,
+        method: str = "nearest",
+        tolerance: str | pd.Timedelta | None = "30min",
+        window: str | pd.Timedelta | None = None,
+    ):
+        """
+        How samples are placed on the timestamps of a well (e.g. the hourly date range).
+
+        Samples are matched on int64 nanosecond arrays with binary searches, so the alignment
+        is O((n + m) log n) and samples off the hourly grid (e.g. a logger with a clock
+        offset) are no longer lost as with "reindex". A timestamp without a sample within
+        the tolerance is missing.
+
+        Attributes:
+        ----------
+        method : str
+            "exact" (the sample at the timestamp, as "reindex"), "nearest", "backward" (the
+            last sample at or before the timestamp, as "merge_asof") or "forward" (the first
+            sample at or after the timestamp). Equidistant samples match the earlier one.
+        tolerance : str | pd.Timedelta, optional
+            The maximum distance between a timestamp and its sample. For "nearest" the range
+            is half-open, [t - tolerance, t + tolerance), like the window: a sample exactly
+            half-way between two hours belongs to the later hour. So with the default
+            "30min" each sample is used for at most one hour of the date range. None is
+            unlimited.
+        window : str | pd.Timedelta, optional
+            Instead of matching one sample, average all samples in the window centred on the
+            timestamp ([t - window / 2, t + window / 2)), e.g. "1h" for hourly means of a
+            logger with a 5 minute interval. Missing samples are ignored.
+        """
+        if method not in _METHODS:
+            raise ValueError(
+                f"Invalid method '{method}'. Use {', '.join(map(repr, _METHODS))}."
+            )
+        self.method = method
+        self.tolerance = None if tolerance is None else pd.Timedelta(tolerance).value
+        self.window = None if window is None else pd.Timedelta(window).value
+
+    def __repr__(self) -> str:
+        return (
+            f"Alignment(method={self.method!r}, tolerance={self.tolerance}, "
+            f"window={self.window})"
+        )
+
+    def match(self, source: np.ndarray, target: np.ndarray) -> tuple:
+        """
+        Return, for each target timestamp (int64 ns), the position of its sample in the
+        sorted source timestamps (int64 ns) and their distance, -1 and the maximum int64 if
+        no sample matches.
+        """
+        n = len(source)
+        before = np.searchsorted(source, target, side="right") - 1
+        after = np.searchsorted(source, target, side="left")
+        has_before, has_after = before >= 0, after < n
+        distance_before = np.full(len(target), _NO_MATCH)
+        distance_before[has_before] = target[has_before] - source[before[has_before]]
+        distance_after = np.full(len(target), _NO_MATCH)
+        distance_after[has_after] = source[after[has_after]] - target[has_after]
+
+        if self.method == "exact":
+            # the first of duplicated samples, which follows the ones before the target
+            positions, distance = after, distance_after
+            distance = np.where(distance == 0, 0, _NO_MATCH)
+        elif self.method == "backward":
+            positions, distance = before, distance_before
+        elif self.method == "forward":
+            positions, distance = after, distance_after
+        else:
+            earlier = distance_before <= distance_after
+            positions = np.where(earlier, before, after)
+            distance = np.where(earlier, distance_before, distance_after)
+
+        if self.tolerance is not None:
+            outside = distance > self.tolerance
+            if self.method == "nearest":
+                # a sample at exactly the tolerance after the timestamp is left to the next
+                outside |= ~earlier & (distance == self.tolerance)
+            distance[outside] = _NO_MATCH
+        return np.where(distance == _NO_MATCH, -1, positions), distance
+
+    def positions(
+        self, source: pd.DatetimeIndex, target: pd.DatetimeIndex
+    ) -> np.ndarray:
+        """
+        Return the position of the matched source timestamp for each target timestamp, or -1.
+        E.g. the hour of the date range of each handreading.
+        """
+        return self.match(_to_ns(source), _to_ns(target))[0]
+
+    def align(self, df: pd.DataFrame, target: pd.DatetimeIndex) -> pd.DataFrame:
+        """
+        Return the (float64) columns of "df" placed on the target timestamps.
+        """
+        aligned = AlignedFrame(self, target, df.columns)
+        aligned.add(df)
+        return aligned.frame()
+
+
+class AlignedFrame:
+
+    def __init__(
+        self, alignment: Alignment, target: pd.DatetimeIndex, columns: pd.Index
+    ):
+        """
+        Accumulates (chunks of) samples placed on target timestamps with an "Alignment".
+
+        Chunks are added one at a time in time order, a target keeps the best matching sample
+        of all chunks (or the sum and count of its window), so the result does not depend on
+        the chunk boundaries. A uint8 mask per sample (e.g. the outlier rules that rejected
+        it) is aligned with the samples: the mask of the matched sample, or the union of the
+        masks in the window.
+
+        Attributes:
+        ----------
+        alignment : Alignment
+            The alignment of the samples.
+        target : pd.DatetimeIndex
+            The (sorted) timestamps to place the samples on.
+        columns : pd.Index
+            The columns of the chunks.
+        """
+        self.alignment = alignment
+        self.target = target
+        self.columns = columns
+        self._target = _to_ns(target)
+        shape = (len(target), len(columns))
+        if alignment.window is None:
+            self._values = np.full(shape, np.nan)
+            self._distance = np.full(len(target), _NO_MATCH)
+            self._mask = np.zeros(len(target), dtype=np.uint8)
+        else:
+            self._sums = np.zeros(shape)
+            self._counts = np.zeros(shape, dtype=np.int64)
+            self._samples = np.zeros(len(target), dtype=np.int64)
+            self._bits = np.zeros((len(target), 8), dtype=np.int64)
+
+    def _targets(self, source: np.ndarray) -> slice:
+        """
+        The targets a chunk of samples can match, all if the tolerance is unlimited.
+        """
+        reach = (
+            self.alignment.window
+            if self.alignment.window is not None
+            else self.alignment.tolerance
+        )
+        if reach is None:
+            return slice(None)
+        return slice(
+            np.searchsorted(self._target, source[0] - reach, side="left"),
+            np.searchsorted(self._target, source[-1] + reach, side="right"),
+        )
+
+    def add(self, df: pd.DataFrame, mask: np.ndarray | None = None):
+        """
+        Add a chunk of samples, later in time than the previous chunks, and their mask.
+        """
+        if df.empty:
+            return
+        source = _to_ns(df.index)
+        values = df.to_numpy(dtype=np.float64)
+        if mask is None:
+            mask = np.zeros(len(df), dtype=np.uint8)
+        if not (np.diff(source) >= 0).all():
+            order = np.argsort(source, kind="stable")
+            source, values, mask = source[order], values[order], mask[order]
+
+        targets = self._targets(source)
+        target = self._target[targets]
+        if self.alignment.window is None:
+            positions, distance = self.alignment.match(source, target)
+            better = distance < self._distance[targets]
+            update = np.arange(len(self._target))[targets][better]
+            self._distance[update] = distance[better]
+            self._values[update] = values[positions[better]]
+            self._mask[update] = mask[positions[better]]
+        else:
+            self._add_window(targets, target, source, values, mask)
+
+    def _add_window(self, targets, target, source, values, mask):
+        half = self.alignment.window // 2
+        lo = np.searchsorted(source, target - half, side="left")
+        hi = np.searchsorted(
+            source, target + (self.alignment.window - half), side="left"
+        )
+
+        # window sums as differences of cumulative sums, relative to the first valid value
+        valid = ~np.isnan(values)
+        first = values[valid.argmax(axis=0), np.arange(values.shape[1])]
+        offset = np.where(valid.any(axis=0), first, 0.0)
+        deviations = np.where(valid, values - offset, 0.0)
+        sums = np.concatenate([np.zeros((1, len(self.columns))), deviations.cumsum(0)])
+        counts = np.concatenate(
+            [np.zeros((1, len(self.columns)), dtype=np.int64), valid.cumsum(0)]
+        )
+        window_counts = counts[hi] - counts[lo]
+        self._sums[targets] += sums[hi] - sums[lo] + offset * window_counts
+        self._counts[targets] += window_counts
+        self._samples[targets] += hi - lo
+
+        if mask.any():
+            bits = (mask[:, None] >> np.arange(8)) & 1
+            bits = np.concatenate([np.zeros((1, 8), dtype=np.int64), bits.cumsum(0)])
+            self._bits[targets] += bits[hi] - bits[lo]
+
+    @property
+    def matched(self) -> np.ndarray:
+        """
+        Whether each target has a sample (or a sample in its window).
+        """
+        if self.alignment.window is None:
+            return self._distance != _NO_MATCH
+        return self._samples > 0
+
+    def frame(self) -> pd.DataFrame:
+        """
+        Return the aligned (float64) values, NaN for targets without a sample.
+        """
+        if self.alignment.window is None:
+            values = self._values
+        else:
+            with np.errstate(invalid="ignore", divide="ignore"):
+                values = self._sums / self._counts
+        return pd.DataFrame(values, index=self.target, columns=self.columns)
+
+    def mask(self) -> np.ndarray:
+        """
+        Return the aligned uint8 mask, 0 for targets without a sample.
+        """
+        if self.alignment.window is None:
+            return self._mask
+        bits = (self._bits > 0).astype(np.uint8) << np.arange(8, dtype=np.uint8)
+        return np.bitwise_or.reduce(bits, axis=1).astype(np.uint8)
@@ -0,0 +1,278 @@
+import hashlib
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable
+
+import numpy as np
+import pandas as pd
+
+_INDEX_FILE = "index.json"
+_ENCODINGS_FILE = "encodings.json"
+_INDEX_COLUMN = "__index__"
+_SERIES_COLUMN = "__series__"
+
+
+def _import_pyarrow():
+    try:
+        import pyarrow as pa
+        import pyarrow.feather as feather
+    except ImportError as e:
+        raise ImportError(
+            "The reader cache, head store and columnar exports require 'pyarrow', "
+            "install the environment with 'pixi install'."
+        ) from e
+    return pa, feather
+
+
+def atomic_write(path: Path, write: Callable):
+    """
+    Write a file via "write(tmp_path)" to a temporary file that replaces "path" when complete,
+    so readers never see a partially written file.
+    """
+    fd, tmp = tempfile.mkstemp(dir=Path(path).parent, suffix=".tmp")
+    os.close(fd)
+    try:
+        write(tmp)
+        os.replace(tmp, path)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+
+
+def file_fingerprint(path: str | Path, content_hash: bool = True) -> dict:
+    """
+    Return a fingerprint (resolved path, size, modification time and optionally the
+    blake2b content hash) identifying the current state of a file.
+    """
+    path = Path(path).resolve()
+    stat = path.stat()
+    fingerprint = {
+        "path": str(path),
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+    }
+    if content_hash:
+        with open(path, "rb") as f:
+            fingerprint["hash"] = hashlib.file_digest(f, "blake2b").hexdigest()
+    return fingerprint
+
+
+class ReaderCache:
+
+    def __init__(
+        self,
+        directory: str | Path,
+        max_bytes: int = 2 * 1024**3,
+        verify_hash: bool = True,
+    ):
+        """
+        A persistent, opt-in cache for DataFrames parsed by the readers.
+
+        Parsed frames are stored as uncompressed Feather (Arrow IPC) files and are reloaded
+        memory-mapped, so numeric columns are not copied. Entries are keyed by reader, reader
+        arguments and the fingerprint of the source file (path, size, mtime and content
+        hash). A changed source file invalidates its entry, the least recently used entries
+        are evicted when the cache grows beyond "max_bytes".
+
+        Attributes:
+        ----------
+        directory : str | Path
+            The directory to store the cached files in, created if it does not exist.
+        max_bytes : int
+            The maximum total size (in bytes) of the cached files.
+        verify_hash : bool
+            Whether to compare the content hash of the source file on every lookup. If
+            "False", an unchanged size and mtime are trusted.
+        """
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.verify_hash = verify_hash
+        self._index = self._load_json(_INDEX_FILE)
+        self._encodings = self._load_json(_ENCODINGS_FILE)
+
+    def _load_json(self, name: str) -> dict:
+        try:
+            with open(self.directory / name) as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def _save_json(self, name: str, data: dict):
+        atomic_write(
+            self.directory / name,
+            lambda tmp: Path(tmp).write_text(json.dumps(data, indent=1)),
+        )
+
+    def _save_index(self):
+        self._save_json(_INDEX_FILE, self._index)
+
+    def get_encoding(self, key: str) -> str | None:
+        """
+        Return the remembered text encoding of a file fingerprint "key", or None.
+        """
+        return self._encodings.get(key)
+
+    def put_encoding(self, key: str, encoding: str):
+        """
+        Remember the detected text encoding of a file fingerprint "key".
+        """
+        self._encodings[key] = encoding
+        self._save_json(_ENCODINGS_FILE, self._encodings)
+
+    @staticmethod
+    def _entry_key(reader_name: str, path: str | Path, kwargs: dict) -> str:
+        key = json.dumps(
+            [reader_name, str(Path(path).resolve()), sorted(kwargs.items())],
+            default=str,
+        )
+        return hashlib.blake2b(key.encode(), digest_size=16).hexdigest()
+
+    def _is_valid(self, entry: dict, path: str | Path) -> bool:
+        fingerprint = file_fingerprint(path, content_hash=False)
+        if not (self.directory / entry["file"]).exists():
+            return False
+        if (
+            fingerprint["size"] != entry["size"]
+            or fingerprint["mtime_ns"] != entry["mtime_ns"]
+        ):
+            return False
+        if self.verify_hash:
+            return file_fingerprint(path)["hash"] == entry["hash"]
+        return True
+
+    def get(self, reader: Callable, path: str | Path, **kwargs):
+        """
+        Return the cached result of "reader(path, **kwargs)", or None if it is not cached or
+        the source file changed (the stale entry is removed).
+        """
+        key = self._entry_key(reader.__name__, path, kwargs)
+        entry = self._index.get(key)
+        if entry is None:
+            return None
+        if not self._is_valid(entry, path):
+            self.invalidate(key)
+            return None
+
+        entry["last_access"] = time.time()
+        self._save_index()
+        return self._load(self.directory / entry["file"])
+
+    def put(
+        self,
+        reader: Callable,
+        path: str | Path,
+        result: pd.DataFrame | pd.Series,
+        fingerprint: dict | None = None,
+        **kwargs,
+    ):
+        """
+        Store the result of "reader(path, **kwargs)". Pass the "fingerprint" of the source
+        file taken before parsing, so a file changed while parsing is not cached as unchanged.
+        """
+        if fingerprint is None:
+            fingerprint = file_fingerprint(path)
+        key = self._entry_key(reader.__name__, path, kwargs)
+        if key in self._index:
+            self.invalidate(key)
+
+        # a unique name per version, a memory-mapped old version cannot be replaced on Windows
+        file = f"{key}-{fingerprint['hash'][:16]}.feather"
+        nbytes = self._store(self.directory / file, result)
+        self._index[key] = {
+            **fingerprint,
+            "reader": reader.__name__,
+            "file": file,
+            "nbytes": nbytes,
+            "last_access": time.time(),
+        }
+        self._evict()
+        self._save_index()
+
+    def get_or_read(self, reader: Callable, path: str | Path, **kwargs):
+        """
+        Return the parsed content of "path", read from the cache if the source file did not
+        change and parsed with "reader(path, **kwargs)" (and stored) otherwise.
+        """
+        result = self.get(reader, path, **kwargs)
+        if result is None:
+            fingerprint = file_fingerprint(path)
+            result = reader(path, **kwargs)
+            self.put(reader, path, result, fingerprint=fingerprint, **kwargs)
+        return result
+
+    def _store(self, path: Path, data: pd.DataFrame | pd.Series) -> int:
+        pa, feather = _import_pyarrow()
+
+        is_series = isinstance(data, pd.Series)
+        if is_series:
+            df = data.to_frame(_SERIES_COLUMN if data.name is None else data.name)
+        else:
+            df = data
+
+        # keep NaN as NaN (no validity bitmap) so columns can be mapped without a copy
+        arrays = [pa.array(df.index.values, from_pandas=False)]
+        arrays += [pa.array(df[c].values, from_pandas=False) for c in df.columns]
+        names = [_INDEX_COLUMN] + [str(c) for c in df.columns]
+        metadata = {
+            "index_name": json.dumps(df.index.name),
+            "series": json.dumps(is_series),
+        }
+        table = pa.Table.from_arrays(arrays, names=names, metadata=metadata)
+
+        atomic_write(
+            path,
+            lambda tmp: feather.write_feather(table, tmp, compression="uncompressed"),
+        )
+        return path.stat().st_size
+
+    @staticmethod
+    def _load(path: Path) -> pd.DataFrame | pd.Series:
+        _, feather = _import_pyarrow()
+
+        table = feather.read_table(path, memory_map=True)
+        metadata = {k.decode(): json.loads(v) for k, v in table.schema.metadata.items()}
+        df = table.to_pandas(split_blocks=True)
+        df = df.set_index(_INDEX_COLUMN).rename_axis(metadata["index_name"])
+        if metadata["series"]:
+            series = df.iloc[:, 0]
+            return series.rename(None if series.name == _SERIES_COLUMN else series.name)
+        return df
+
+    def _remove(self, file: str):
+        try:
+            (self.directory / file).unlink(missing_ok=True)
+        except PermissionError:
+            # still memory-mapped by a loaded frame (Windows), no longer indexed
+            pass
+
+    def invalidate(self, key: str | None = None):
+        """
+        Remove one cache entry by key, or all entries if no key is given.
+        """
+        keys = list(self._index) if key is None else [key]
+        for k in keys:
+            entry = self._index.pop(k, None)
+            if entry is not None:
+                self._remove(entry["file"])
+        self._save_index()
+
+    def _evict(self):
+        entries = sorted(self._index.items(), key=lambda item: item[1]["last_access"])
+        total = np.sum([entry["nbytes"] for _, entry in entries])
+        for key, entry in entries:
+            if total <= self.max_bytes:
+                break
+            total -= entry["nbytes"]
+            self._index.pop(key)
+            self._remove(entry["file"])
+
+    @property
+    def nbytes(self) -> int:
+        """
+        Total size (in bytes) of all cached files.
+        """
+        return int(np.sum([entry["nbytes"] for entry in self._index.values()]))
@@ -1,15 +1,196 @@
 import pandas as pd
 import numpy as np
 
+import json
+from collections.abc import Iterable
 from pathlib import Path
-from scipy import stats
-from .helper_functions import EC_to_S, S_to_rho
+from .helper_functions import (
+    REF_PRESSURE,
+    REF_TEMPERATURE,
+    DensityTable,
+    EC_to_S,
+    S_to_rho,
+    check_float_dtype,
+)
+from .alignment import AlignedFrame, Alignment
+from .drift_correction import DriftCorrection
+from .exports import check_export_format, export_path, write_columns
+from .gaps import DROPPED, MISSING, GapIndex
+from .outlier_filters import OutlierFilter
 
 # Pieter comment
 
+# series samples are placed on the nearest hour within half an hour, a handreading on the
+# first hour at or after it
+_DEFAULT_ALIGNMENT = Alignment("nearest", "30min")
+_HANDREADING_ALIGNMENT = Alignment("forward", "1h")
+
+# the inputs each derived head depends on, directly or through another head
+_HEAD_DEPENDENCIES = {
+    "point_water_head": (
+        "barometer_data",
+        "diver_data",
+        "water_density",
+        "geometry",
+        "gw_measurements",
+        "compensation",
+    ),
+    "fresh_water_head": ("point_water_head", "water_density", "geometry"),
+    "fresh_water_ref_head": ("point_water_head", "water_density", "geometry"),
+}
+
+
+# aggregation periods of "MonitoringWell.aggregate", coarser periods derive from daily sums
+_AGGREGATE_FREQUENCIES = {
+    "h": "h",
+    "1h": "h",
+    "D": "1D",
+    "1D": "1D",
+    "W": "W",
+    "M": "MS",
+    "MS": "MS",
+}
+# the levels of the time-series pyramid, from fine to coarse, with their (mean) bin width
+_PYRAMID_LEVELS = {
+    "h": pd.Timedelta("1h"),
+    "1D": pd.Timedelta("1D"),
+    "W": pd.Timedelta("7D"),
+    "M": pd.Timedelta(days=365.25 / 12),
+}
+# percentiles of the summary statistics of a head
+_SUMMARY_PERCENTILES = (5, 25, 50, 75, 95)
+
+
+def _head_inputs(name: str) -> set:
+    """
+    Return the (transitive) inputs a derived head depends on.
+    """
+    inputs = set()
+    for dependency in _HEAD_DEPENDENCIES[name]:
+        if dependency in _HEAD_DEPENDENCIES:
+            inputs |= _head_inputs(dependency)
+        else:
+            inputs.add(dependency)
+    return inputs
+
+
+class _Input:
+    """
+    An attribute of MonitoringWell that invalidates the derived heads depending on it when it
+    is assigned. "group" is the input name used in the dependency graph.
+    """
+
+    def __init__(self, group: str = None):
+        self.group = group
+
+    def __set_name__(self, owner, name):
+        self.name = name
+        self.group = self.group or name
+
+    def __get__(self, obj, objtype=None):
+        if obj is None:
+            return self
+        try:
+            return obj.__dict__[self.name]
+        except KeyError:
+            raise AttributeError(
+                f"'{type(obj).__name__}' object has no attribute '{self.name}'"
+            ) from None
+
+    def __set__(self, obj, value):
+        obj.__dict__[self.name] = value
+        obj._touch(self.group)
+
+
+class _Head:
+    """
+    A derived head of MonitoringWell, computed lazily and cached until one of its inputs
+    changes. The dropped periods (see "drop_data") are applied
+    to the returned frame. Assigning a head stores it as computed from the current inputs.
+    """
+
+    def __set_name__(self, owner, name):
+        self.name = name
+
+    def __get__(self, obj, objtype=None):
+        if obj is None:
+            return self
+        return obj._dropped_head(self.name)
+
+    def __set__(self, obj, value):
+        obj._heads[self.name] = (obj._head_key(self.name), value)
+
+
+class StepSeries:
+
+    def __init__(self, name: str, value: float, dtype: str = "float64"):
+        """
+        A piecewise-constant series (e.g. well geometry), stored as a table of breakpoints
+        instead of a value per timestep.
+
+        Attributes:
+        ----------
+        name : str
+            The column name used when the series is evaluated to a DataFrame.
+        value : float
+            The initial value, valid from the start of time.
+        dtype : str, optional
+            The float dtype of the values. Defaults to "float64".
+        """
+        self.name = name
+        self.dtype = check_float_dtype(dtype)
+        self.breakpoints = np.array([np.iinfo(np.int64).min], dtype=np.int64)
+        self.values = np.array([value], dtype=self.dtype)
+
+    def set_from(self, date: pd.Timestamp, value: float):
+        """
+        Set the value from "date" onward, later breakpoints are overwritten.
+        """
+        keep = self.breakpoints < date.value
+        self.breakpoints = np.append(self.breakpoints[keep], date.value)
+        self.values = np.append(self.values[keep], self.dtype.type(value))
+
+    def set_steps(self, dates: pd.DatetimeIndex, values: np.ndarray):
+        """
+        Set the values from each of the (increasing) "dates" onward in one pass, equal to
+        calling "set_from" for each date in order.
+        """
+        dates = np.asarray(dates.asi8)
+        if (np.diff(dates) <= 0).any():
+            raise ValueError("Dates of the steps should be strictly increasing.")
+        if len(dates) == 0:
+            return
+        keep = self.breakpoints < dates[0]
+        self.breakpoints = np.concatenate([self.breakpoints[keep], dates])
+        self.values = np.concatenate(
+            [self.values[keep], np.asarray(values, dtype=self.dtype)]
+        )
+
+    def evaluate(self, index: pd.DatetimeIndex) -> np.ndarray:
+        """
+        Return the values at the timestamps of "index".
+        """
+        positions = np.searchsorted(self.breakpoints, index.asi8, side="right") - 1
+        return self.values[positions]
+
+    def to_frame(self, index: pd.DatetimeIndex) -> pd.DataFrame:
+        return pd.DataFrame({self.name: self.evaluate(index)}, index=index)
+
 
 class MonitoringWell:
 
+    reference_level = _Input("geometry")
+    elevation_head = _Input("geometry")
+    barometer_data = _Input()
+    diver_data = _Input()
+    _water_density = _Input("water_density")
+    ec_measurements = _Input("water_density")
+    _gw_readings = _Input("gw_measurements")
+
+    point_water_head = _Head()
+    fresh_water_head = _Head()
+    fresh_water_ref_head = _Head()
+
     def __init__(
         self,
         well_id: str,
@@ -19,6 +200,7 @@ class MonitoringWell:
         well_depth: float,
         start_date: str,
         end_date: str,
+        dtype: str = "float64",
     ):
         """
         A class to represent a monitoring well used for measuring and tracking groundwater levels and other environmental parameters.
@@ -39,25 +221,267 @@ class MonitoringWell:
             The date when monitoring at the well began, formatted as a string ("DD-MM-YYYY").
         end_date : str
             The date when monitoring at the well ended, formatted as a string ("DD-MM-YYYY").
+        dtype : str, optional
+            The float dtype of all stored series, "float64" (default) or "float32". With
+            "float32" the memory of the well is halved. Heads in m NAP are then stored with a
+            resolution better than 4e-6 m (|head| < 64 m) and differ less than 1e-4 m from the
+            "float64" computation, far below the accuracy of a diver (~5e-3 m).
 
+        The point water, fresh water and fresh water reference heads are computed lazily when
+        accessed after "barometric_compensation", and only recomputed when one of the inputs
+        they depend on changes (barometer, diver data, water density, geometry, groundwater
+        measurements, compensation settings or dropped periods).
         """
 
+        # versions of the inputs and cached (version key, frame) of the derived heads
+        self._versions = dict.fromkeys(
+            [
+                "barometer_data",
+                "diver_data",
+                "water_density",
+                "geometry",
+                "gw_measurements",
+                "compensation",
+                "drop",
+            ],
+            0,
+        )
+        self._heads = {}
+        self._aggregates = {}
+        self._gw_heads = None
+        self._density = None
+        self._compensation = None
+        self._gaps = None
+        self._drops = []
+        self._exclusion_layer = None
+
         self.well_id = well_id
+        self.dtype = check_float_dtype(dtype)
         self.date_range = pd.date_range(
             start=pd.to_datetime(start_date, format="%d-%m-%Y"),
             end=pd.to_datetime(end_date, format="%d-%m-%Y"),
             freq="h",
         )
         self.reference_level = reference_level
-        self.ztop = pd.DataFrame({"ztop (m NAP)": ztop}, index=self.date_range)
-        self.cable_length = pd.DataFrame(
-            {"cable_length (m)": cable_length}, index=self.date_range
+        self._ztop = StepSeries("ztop (m NAP)", ztop, dtype=self.dtype)
+        self._cable_length = StepSeries(
+            "cable_length (m)", cable_length, dtype=self.dtype
         )
         self.well_depth = well_depth
         self.elevation_head = ztop - well_depth
         self.water_density = pd.DataFrame(
-            {"water_density (kg/m3)": 1000}, index=self.date_range
+            {"water_density (kg/m3)": 1000}, index=self.date_range, dtype=self.dtype
+        )
+
+    def _touch(self, group: str):
+        self._versions[group] += 1
+
+    def _head_key(self, name: str) -> tuple:
+        return tuple(self._versions[i] for i in sorted(_head_inputs(name)))
+
+    def _head(self, name: str) -> pd.DataFrame:
+        """
+        Return a derived head without the dropped periods, (re)computed if an input changed.
+        """
+        key = self._head_key(name)
+        cached = self._heads.get(name)
+        if cached is None or cached[0] != key:
+            if self._compensation is None:
+                raise AttributeError(
+                    f"'{name}' is not available, call 'barometric_compensation' first."
+                )
+            compute = {
+                "point_water_head": self._compute_point_water_head,
+                "fresh_water_head": self.calculate_fresh_water_head,
+                "fresh_water_ref_head": self.calculate_fresh_water_ref_head,
+            }[name]
+            cached = (key, compute())
+            self._heads[name] = cached
+        return cached[1]
+
+    def _dropped_head(self, name: str) -> pd.DataFrame:
+        head = self._head(name)
+        key = (self._heads[name][0], self._versions["drop"])
+        cached = self._heads.get(f"{name} dropped")
+        if cached is None or cached[0] != key:
+            cached = (key, self._apply_drops(head))
+            self._heads[f"{name} dropped"] = cached
+        return cached[1]
+
+    def gap_index(self) -> GapIndex:
+        """
+        Return the gaps of the point water head before interpolation (where the diver,
+        barometer or water density is missing), built once and rebuilt when one of them
+        changes. See "GapIndex.statistics" and "GapIndex.to_frame" for a gap report.
+        """
+        key = tuple(
+            self._versions[i] for i in ("barometer_data", "diver_data", "water_density")
         )
+        if self._gaps is None or self._gaps[0] != key:
+            missing = (
+                self.diver_data["diver_pressure (mH2O)"].isna().to_numpy()
+                | self.barometer_data["air_pressure (mH2O)"].isna().to_numpy()
+                | self.water_density["water_density (kg/m3)"].isna().to_numpy()
+            )
+            self._gaps = (key, GapIndex(missing, self.date_range))
+        return self._gaps[1]
+
+    def _interpolation(self) -> dict:
+        """
+        The gap limits of the point water head interpolation: the first missing value of each
+        gap, or whole gaps up to the "max_gap" of "barometric_compensation".
+        """
+        max_gap = self._compensation[2] if self._compensation else None
+        if max_gap is None:
+            return {"limit": 1}
+        return {"max_gap": max_gap}
+
+    def aggregate(self, name: str, freq: str = "1D") -> pd.DataFrame:
+        """
+        Return the mean, minimum, maximum and count of a diver data column or derived head
+        per period.
+
+        Together the periods form a time-series pyramid (hourly, daily, weekly and monthly):
+        the daily aggregates are computed once from the hourly data and cached, weekly and
+        monthly aggregates are derived from the daily sums and counts. The cache is
+        invalidated when the diver data (or, for heads, one of their inputs or the dropped
+        periods) changes. See "pyramid_level" to pick a level for a display.
+
+        Parameters:
+        ----------
+        name : str
+            A column of "diver_data" (e.g. "temperature (degC)") or a derived head
+            ("point_water_head", "fresh_water_head" or "fresh_water_ref_head").
+        freq : str, optional
+            The period, "h" (hourly), "1D" (daily, default), "W" (weekly, ending on
+            Sunday) or "M" (monthly, labelled by the first day of the month).
+        """
+        if freq not in _AGGREGATE_FREQUENCIES:
+            raise ValueError(f"Invalid freq '{freq}'. Use 'h', '1D', 'W' or 'M'.")
+        freq = _AGGREGATE_FREQUENCIES[freq]
+
+        if name in _HEAD_DEPENDENCIES:
+            series = getattr(self, name).iloc[:, 0]
+            key = (self._heads[name][0], self._versions["drop"])
+        else:
+            series = self.diver_data[name]
+            key = self._versions["diver_data"]
+
+        cached = self._aggregates.get((name, freq))
+        if cached is None or cached[0] != key:
+            if freq == "h":
+                sums = pd.DataFrame(
+                    {
+                        "sum": series,
+                        "count": series.notna().astype(np.int64),
+                        "min": series,
+                        "max": series,
+                    }
+                )
+            elif freq == "1D":
+                sums = series.groupby(pd.Grouper(freq="1D")).agg(
+                    ["sum", "count", "min", "max"]
+                )
+            else:
+                self.aggregate(name, "1D")
+                sums = (
+                    self._aggregates[(name, "1D")][1]
+                    .groupby(pd.Grouper(freq=freq))
+                    .agg({"sum": "sum", "count": "sum", "min": "min", "max": "max"})
+                )
+            cached = (key, sums)
+            self._aggregates[(name, freq)] = cached
+
+        sums = cached[1]
+        mean = (sums["sum"] / sums["count"]).astype(series.dtype, copy=False)
+        if freq == "h":
+            mean = series
+        return pd.DataFrame(
+            {
+                "mean": mean,
+                "min": sums["min"],
+                "max": sums["max"],
+                "count": sums["count"],
+            }
+        )
+
+    def pyramid_level(
+        self, width: float = 1000, start: str | None = None, end: str | None = None
+    ) -> str:
+        """
+        Return the coarsest level of the time-series pyramid ("h", "1D", "W" or "M", see
+        "aggregate") that still has a bin per pixel of a display "width" pixels wide, over
+        the date range or the window from "start" to "end" ("dd-mm-yyyy"). Plotting the mean
+        (and the minimum and maximum) of that level then looks the same as the hourly values,
+        at a cost that does not grow with the length of the record.
+        """
+        first = (
+            self.date_range[0]
+            if start is None
+            else pd.to_datetime(start, format="%d-%m-%Y")
+        )
+        last = (
+            self.date_range[-1]
+            if end is None
+            else pd.to_datetime(end, format="%d-%m-%Y")
+        )
+        resolution = (last - first) / width
+        level = "h"
+        for freq, step in _PYRAMID_LEVELS.items():
+            if step <= resolution:
+                level = freq
+        return level
+
+    def summary(self, name: str = "fresh_water_ref_head") -> pd.Series:
+        """
+        Return the summary statistics of a derived head without the dropped periods: the
+        number of values and the fraction of the date range they cover, the mean, minimum,
+        percentiles and maximum, and the last value with its timestamp. Cached until the head
+        or the dropped periods change.
+        """
+        head = getattr(self, name).iloc[:, 0]
+        key = (self._heads[name][0], self._versions["drop"])
+        cached = self._aggregates.get((name, "summary"))
+        if cached is None or cached[0] != key:
+            values = head.to_numpy(dtype=np.float64)
+            valid = np.flatnonzero(~np.isnan(values))
+            names = ["mean", "min", *[f"p{q}" for q in _SUMMARY_PERCENTILES], "max"]
+            if len(valid):
+                measured = values[valid]
+                distribution = [
+                    measured.mean(),
+                    measured.min(),
+                    *np.percentile(measured, _SUMMARY_PERCENTILES),
+                    measured.max(),
+                ]
+                last_date, last_value = head.index[valid[-1]], values[valid[-1]]
+            else:
+                distribution = [np.nan] * len(names)
+                last_date, last_value = pd.NaT, np.nan
+            statistics = (
+                {"count": len(valid), "coverage": len(valid) / len(self.date_range)}
+                | dict(zip(names, distribution))
+                | {"last_date": last_date, "last_value": last_value}
+            )
+            cached = (key, pd.Series(statistics, name=self.well_id))
+            self._aggregates[(name, "summary")] = cached
+        return cached[1]
+
+    @property
+    def ztop(self) -> pd.DataFrame:
+        """
+        The elevation of the top of the well casing (m NAP) over the date range, evaluated
+        from the breakpoints of the well geometry.
+        """
+        return self._ztop.to_frame(self.date_range)
+
+    @property
+    def cable_length(self) -> pd.DataFrame:
+        """
+        The cable length (m) over the date range, evaluated from the breakpoints of the well
+        geometry.
+        """
+        return self._cable_length.to_frame(self.date_range)
 
     def update_properties(
         self,
@@ -82,11 +506,52 @@ class MonitoringWell:
         """
         date_correction = pd.to_datetime(date_correction, format="%d-%m-%Y")
         if new_ztop is not None:
-            self.ztop.loc[date_correction:] = new_ztop
+            self._ztop.set_from(date_correction, new_ztop)
         if new_cable_length is not None:
-            self.cable_length.loc[date_correction:] = new_cable_length
+            self._cable_length.set_from(date_correction, new_cable_length)
+        self._touch("geometry")
+
+    def apply_property_changes(self, table: pd.DataFrame):
+        """
+        Applies all dated changes of the ztop and/or cable length properties at once.
+
+        Equal to calling "update_properties" for every row in chronological order, but the
+        table is validated first and applied in a single vectorized pass.
+
+        Parameters:
+        ----------
+        table : pd.DataFrame
+            A DataFrame with the dates of the changes as (DatetimeIndex) index and the columns
+            "ztop (m NAP)" and/or "cable_length (m)". Missing values (NaN) leave the property
+            unchanged at that date. See "readers.property_changes_from_metadata".
+        """
+        if not isinstance(table.index, pd.DatetimeIndex):
+            raise ValueError("The index of the property changes should be dates.")
+        if not table.index.is_monotonic_increasing or table.index.has_duplicates:
+            raise ValueError(
+                "The dates of the property changes should be unique and increasing."
+            )
+        unknown = set(table.columns) - {self._ztop.name, self._cable_length.name}
+        if unknown:
+            raise ValueError(f"Unknown properties {sorted(unknown)}.")
+
+        for steps in (self._ztop, self._cable_length):
+            if steps.name in table:
+                changes = table[steps.name].dropna()
+                steps.set_steps(changes.index, changes.to_numpy())
+        self._touch("geometry")
 
-    def add_barometer(self, df: pd.DataFrame):
+    def _measurement_positions(
+        self, index: pd.DatetimeIndex, alignment: Alignment
+    ) -> np.ndarray:
+        """
+        The position in the date range of each measurement (e.g. a handreading), or -1.
+        """
+        if alignment.window is not None:
+            raise ValueError("Measurements are matched to an hour, not averaged.")
+        return alignment.positions(self.date_range, index)
+
+    def add_barometer(self, df: pd.DataFrame, alignment: Alignment | None = None):
         """
         Adds barometer data to the MonitoringWell.
 
@@ -97,29 +562,122 @@ class MonitoringWell:
         ----------
         df : pd.DataFrame
             A DataFrame containing barometer air pressure data (mH20) with a datetime index.
+        alignment : Alignment, optional
+            How samples are placed on the hours of the date range. Defaults to the nearest
+            sample within 30 minutes.
         """
-        self.barometer_data = df.reindex(self.date_range)
+        alignment = _DEFAULT_ALIGNMENT if alignment is None else alignment
+        self.barometer_data = alignment.align(df, self.date_range).astype(
+            self.dtype, copy=False
+        )
 
-    def add_diverdata(self, df: pd.DataFrame, zscore_limit=3):
+    def add_diverdata(
+        self,
+        df: pd.DataFrame | Iterable[pd.DataFrame],
+        zscore_limit=3,
+        outlier_filter: OutlierFilter | None = None,
+        alignment: Alignment | None = None,
+    ):
         """
         Adds diver data to the MonitoringWell.
 
         This method reads barometer data provided in the form of a DataFrame, aligns it with the object's
         existing date range, removes outliers and assigns it to the "diver_data" attribute.
+        The rules that rejected each sample are stored in the "rejected" attribute, a uint8
+        mask on the date range with a bit per rule of the "outlier_filter" (0 is kept).
 
         Parameters:
         ----------
-        df : pd.DataFrame
-            A DataFrame containing barometer diver pressure data (mH20) with a datetime index.
+        df : pd.DataFrame | Iterable[pd.DataFrame]
+            A DataFrame containing barometer diver pressure data (mH20) with a datetime index,
+            or an iterable of such DataFrames (e.g. "iter_diver_chunks"). Chunks are aligned
+            one at a time, so memory is bounded by the date range instead of the record length.
+        zscore_limit : float, optional
+            The z-score limit of the default outlier filter. Defaults to 3.
+        outlier_filter : OutlierFilter, optional
+            The outlier rules to apply to the diver pressure, e.g. with a "HampelRule" or
+            "SpikeRule". Defaults to "OutlierFilter.default(zscore_limit)": the z-score and
+            a minimum pressure of 11 mH2O.
+        alignment : Alignment, optional
+            How samples are placed on the hours of the date range, e.g. averaged per hour.
+            Defaults to the nearest sample within 30 minutes. Outliers are removed before
+            averaging, so streamed chunks can only be aligned with a window by an
+            "outlier_filter" without global rules.
         """
+        if outlier_filter is None:
+            outlier_filter = OutlierFilter.default(zscore_limit)
+        self.outlier_filter = outlier_filter
+        alignment = _DEFAULT_ALIGNMENT if alignment is None else alignment
 
-        criterium_1 = abs(stats.zscore(df["diver_pressure (mH2O)"])) < zscore_limit
-        criterium_2 = df["diver_pressure (mH2O)"] > 11
-        valid = criterium_1 & criterium_2
+        if not isinstance(df, pd.DataFrame):
+            self._add_diverdata_chunks(df, outlier_filter, alignment)
+            return
 
-        self.diver_data = df.where(valid).reindex(self.date_range)
+        rejected = outlier_filter.apply(df["diver_pressure (mH2O)"].to_numpy())
+        aligned = AlignedFrame(alignment, self.date_range, df.columns)
+        aligned.add(df.where(pd.Series(rejected == 0, index=df.index)), rejected)
+        self.rejected = pd.Series(
+            aligned.mask(), index=self.date_range, name="rejected"
+        )
+        self.diver_data = aligned.frame().astype(self.dtype, copy=False)
 
-    def add_ec_measurements(self, df: pd.DataFrame):
+    def _add_diverdata_chunks(
+        self,
+        chunks: Iterable[pd.DataFrame],
+        outlier_filter: OutlierFilter,
+        alignment: Alignment,
+    ):
+        """
+        Streaming equivalent of "add_diverdata": the local outlier rules are applied per chunk
+        with the context of the neighbouring chunks, the statistics of the global rules (the
+        z-score) are accumulated per chunk and only the aligned samples are kept. The global
+        rules are applied to the aligned samples after the last chunk. With a window the
+        samples are averaged before the global statistics are known, so the global rules
+        could only be applied to the window means instead of the samples: this is refused.
+        """
+        if alignment.window is not None and any(
+            rule.is_global for rule in outlier_filter.rules
+        ):
+            raise ValueError(
+                "Global outlier rules (e.g. the z-score) can not be applied per sample to "
+                "streamed diver data aligned with a window. Pass a DataFrame, an alignment "
+                "without a window or an outlier filter with only local rules."
+            )
+        aligned = None
+        for chunk, chunk_rejected in outlier_filter.stream(
+            chunks, "diver_pressure (mH2O)"
+        ):
+            if aligned is None:
+                aligned = AlignedFrame(
+                    alignment, self.date_range, chunk.columns.append(pd.Index(["raw"]))
+                )
+            # the local rejections are removed before aligning, like the in-memory path,
+            # the raw pressure is kept for the global rules
+            kept = chunk.where(pd.Series(chunk_rejected == 0, index=chunk.index))
+            kept["raw"] = chunk["diver_pressure (mH2O)"]
+            aligned.add(kept, chunk_rejected)
+
+        if aligned is None:
+            raise ValueError("No diver data in the provided chunks.")
+
+        diver_data = aligned.frame()
+        pressure = diver_data.pop("raw").to_numpy()
+        rejected = np.where(
+            aligned.matched, outlier_filter.global_mask(pressure), 0
+        ).astype(np.uint8)
+        self.rejected = pd.Series(
+            aligned.mask() | rejected, index=self.date_range, name="rejected"
+        )
+        self.diver_data = diver_data.where(
+            pd.Series(rejected == 0, index=self.date_range)
+        ).astype(self.dtype, copy=False)
+
+    def add_ec_measurements(
+        self,
+        df: pd.DataFrame,
+        density_table: DensityTable | None = None,
+        alignment: Alignment | None = None,
+    ):
         """
         Loads electrical conductivity (EC) measurements (in mS/cm) into the instance's `ec_measurements` attribute
         and updates water density accordingly.
@@ -128,51 +686,82 @@ class MonitoringWell:
         ----------
         df : pd.DataFrame
             A DataFrame containing electrical conductivity (EC) measurements (in mS/cm).
+        density_table : DensityTable, optional
+            A "DensityTable.conductivity" to look up the density from EC and temperature
+            instead of evaluating the UNESCO formulas. Defaults to the exact formulas.
+        alignment : Alignment, optional
+            How the measurements are matched to an hour of the date range, measurements
+            without a matching hour are not used. Defaults to the nearest hour within 30
+            minutes.
+        """
+        alignment = _DEFAULT_ALIGNMENT if alignment is None else alignment
+        positions = self._measurement_positions(df.index, alignment)
+        self._density_table = density_table
+        self.ec_measurements = df[positions >= 0].set_axis(
+            self.date_range[positions[positions >= 0]]
+        )
+
+    @property
+    def water_density(self) -> pd.DataFrame:
+        """
+        The water density (kg/m3) at each hour of the date range. With EC measurements it is
+        calculated from them and the temperature of the diver data, and recalculated when
+        either changes. Otherwise it is the assigned density (1000 kg/m3 by default).
         """
+        if "ec_measurements" not in self.__dict__:
+            return self._water_density
+        key = (self._versions["water_density"], self._versions["diver_data"])
+        if self._density is None or self._density[0] != key:
+            self._density = (key, self._calculate_water_density())
+        return self._density[1]
 
-        self.ec_measurements = df
-        self._calculate_water_density()
+    @water_density.setter
+    def water_density(self, value: pd.DataFrame):
+        # an assigned density replaces the density calculated from the EC measurements
+        self.__dict__.pop("ec_measurements", None)
+        self._water_density = value
 
-    def _calculate_water_density(self):
+    def _calculate_water_density(self) -> pd.DataFrame:
         """
         Calculates the water density based on electrical conductivity (EC) measurements
-        and associated temperature data, then stores the results in the "water_density" attribute.
+        and associated temperature data.
 
         """
-        # Reference conditions for salinity calculation
-        ref_temperature = 20  # °C
-        ref_pressure = 10  # dbar
-
         ec_values = self.ec_measurements[
             ["electrical_conductivity (mS/cm)"]
         ].values.flatten()
         ec_index = self.ec_measurements.index
 
         temperature_at_diver = (
-            self.diver_data.groupby(pd.Grouper(freq="1D"))
-            .mean()
-            .loc[ec_index, "temperature (degC)"]
+            self.aggregate("temperature (degC)", "1D")["mean"]
+            .loc[ec_index.floor("D")]
             .values
         )
 
-        salinity = EC_to_S(ec_values, ref_temperature, ref_pressure)
-        density = S_to_rho(salinity, temperature_at_diver)
+        # salinity at the reference conditions of the EC measurements
+        if self._density_table is None:
+            salinity = EC_to_S(ec_values, REF_TEMPERATURE, REF_PRESSURE)
+            density = S_to_rho(salinity, temperature_at_diver)
+        else:
+            density = self._density_table(ec_values, temperature_at_diver)
 
         water_density = pd.DataFrame(
-            data={"water_density (kg/m3)": density}, index=ec_index
+            data={"water_density (kg/m3)": density}, index=ec_index, dtype=self.dtype
         )
 
-        water_density = water_density.reindex(self.date_range)
-        self.water_density = (
-            water_density.interpolate(method="linear", axis=0).ffill().bfill()
+        # interpolated between the measurements, constant before the first and after the last
+        density = water_density["water_density (kg/m3)"].reindex(self.date_range)
+        density[:] = GapIndex.from_series(density).interpolate(
+            density.to_numpy(), fill_leading=True
         )
+        return density.to_frame()
 
-    def add_gw_measurements(self, df: pd.DataFrame):
+    def add_gw_measurements(self, df: pd.DataFrame, alignment: Alignment | None = None):
         """
         Adds a handreadings to the "Monitoring Well" object.
 
-        The method stores provided handreadings (in meter min ztop) and converts meter NAP
-        based on the provided DataFrame,
+        The method stores provided handreadings (in meter min ztop), they are converted to
+        meter NAP with the ztop at the time of access (see "gw_measurements").
 
         Parameters
         ----------
@@ -180,18 +769,52 @@ class MonitoringWell:
             A DataFrame containing the handreading data with the following structure:
             - Index: DatetimeIndex representing the date and time of the handreading.
             - Columns: 'head (m-ztop)': float, representing the head reading in meters below "ztop".
-
+              Optionally 'weight': float, the weight of the handreading in the "drift" matching.
+        alignment : Alignment, optional
+            How the handreadings are matched to an hour of the date range, handreadings
+            without a matching hour are not used. Defaults to the first hour at or after the
+            handreading (within 1 hour).
         """
-        indices = np.searchsorted(self.date_range, df.index)
-        gw_measurements = self.ztop.iloc[indices] - df[["head (m-ztop)"]].values
-        self.gw_measurements = gw_measurements.rename(
-            columns={"ztop (m NAP)": "head (m NAP)"}
+        alignment = _HANDREADING_ALIGNMENT if alignment is None else alignment
+        positions = self._measurement_positions(df.index, alignment)
+        columns = ["head (m-ztop)"] + (["weight"] if "weight" in df.columns else [])
+        self._gw_readings = df[columns][positions >= 0].set_axis(
+            self.date_range[positions[positions >= 0]]
         )
 
+    @property
+    def gw_measurements(self) -> pd.DataFrame:
+        """
+        The handreadings in m NAP ("head (m NAP)", and "weight" when provided), converted
+        from the stored depths below ztop with the current well geometry, so changes of
+        ztop after "add_gw_measurements" are taken into account.
+        """
+        if "_gw_readings" not in self.__dict__:
+            raise AttributeError(
+                f"'{type(self).__name__}' object has no attribute 'gw_measurements', "
+                "call 'add_gw_measurements' first."
+            )
+        readings = self._gw_readings
+        key = (self._versions["gw_measurements"], self._versions["geometry"])
+        if self._gw_heads is None or self._gw_heads[0] != key:
+            gw_measurements = pd.DataFrame(
+                {
+                    "head (m NAP)": self._ztop.evaluate(readings.index)
+                    - readings["head (m-ztop)"].values
+                },
+                index=readings.index,
+                dtype=self.dtype,
+            )
+            if "weight" in readings.columns:
+                gw_measurements["weight"] = readings["weight"].to_numpy()
+            self._gw_heads = (key, gw_measurements)
+        return self._gw_heads[1]
+
     def barometric_compensation(
         self,
         match_gw_measurements=False,
         method="last",
+        max_gap: int | str | pd.Timedelta | None = None,
     ):
         """
         Perform barometric compensation on the pressure data to calculate the groundwater head.
@@ -200,6 +823,9 @@ class MonitoringWell:
         for barometric pressure. It also interpolates and applies corrections based on
         manual handreadings if "match_handreadings" is set to "True".
 
+        The heads are computed lazily: this method stores the settings, the "point_water_head",
+        "fresh_water_head" and "fresh_water_ref_head" attributes are (re)computed on access.
+
         Parameters
         ----------
         match_gw_measurements : bool, optional
@@ -210,102 +836,187 @@ class MonitoringWell:
             - "last": Use the last handreading for adjustment.
             - "penultimate": Use the second last handreading for adjustment.
             - "all": Interpolate adjustments for all available groundwater measurements.
+            - "drift": Fit an offset and drift per period of constant well geometry to all
+              groundwater measurements, with a robust loss (see "DriftCorrection"). Pass a
+              "DriftCorrection" instance to configure the fit.
             Defaults to "last".
+        max_gap : int | str | pd.Timedelta, optional
+            Interpolate gaps in the head up to this number of timesteps or duration (e.g.
+            "6h") entirely and keep longer gaps. Defaults to "None": only the first missing
+            value of each gap is interpolated.
+        """
+        if match_gw_measurements:
+            if not hasattr(self, "gw_measurements"):
+                raise ValueError("No groundwater measurements available to match.")
+            if not isinstance(method, DriftCorrection) and method not in (
+                "last",
+                "penultimate",
+                "all",
+                "drift",
+            ):
+                raise ValueError(
+                    f"Invalid method '{method}'. Use 'last, 'penultimate', 'all' or "
+                    "'drift'."
+                )
+
+        self._compensation = (match_gw_measurements, method, max_gap)
+        self._touch("compensation")
+
+    def _compute_point_water_head(self) -> pd.DataFrame:
+        match_gw_measurements, method, _ = self._compensation
+        point_water_head = self._uncorrected_point_water_head()
+
+        # Match and adjust with groundwater measurements if requested
+        if match_gw_measurements:
+            correction_factor = self._correction_factor(point_water_head, method)
+            point_water_head -= correction_factor.astype(self.dtype, copy=False)
+
+        return point_water_head.to_frame("point_water_head (m NAP)")
+
+    def _uncorrected_point_water_head(self, window: slice = slice(None)) -> pd.Series:
+        """
+        Calculate the point water head (before matching the groundwater measurements) on a
+        window of the date range. For a window starting one timestep before the period of
+        interest, the values in that period equal those of the full date range.
         """
         GRAVITATIONAL_ACCELERATION = 9.80665  # m/s²
 
         # Calculate water pressure (adjusting for barometric pressure)
         water_pressure = (
-            self.diver_data["diver_pressure (mH2O)"]
-            - self.barometer_data["air_pressure (mH2O)"]
+            self.diver_data["diver_pressure (mH2O)"].iloc[window]
+            - self.barometer_data["air_pressure (mH2O)"].iloc[window]
         )
 
         # Compute water column height
         water_column = (9806.65 * water_pressure) / (
-            self.water_density["water_density (kg/m3)"] * GRAVITATIONAL_ACCELERATION
+            self.water_density["water_density (kg/m3)"].iloc[window]
+            * GRAVITATIONAL_ACCELERATION
         )
 
-        # Calculate the point water head
-        point_water_head = (
-            self.ztop["ztop (m NAP)"]
-            - self.cable_length["cable_length (m)"]
-            + water_column
+        # Calculate the point water head (geometry is evaluated from its breakpoints)
+        ztop = self._ztop.evaluate(self.date_range[window])
+        cable_length = self._cable_length.evaluate(self.date_range[window])
+        point_water_head = (ztop - cable_length + water_column).astype(
+            self.dtype, copy=False
+        )
+        gaps = self.gap_index().window(window)
+        point_water_head[:] = gaps.interpolate(
+            point_water_head.to_numpy(), **self._interpolation()
         )
-        point_water_head = point_water_head.interpolate("linear", limit=1)
+        return point_water_head
 
-        # Store the result
-        self.point_water_head = point_water_head.to_frame("point_water_head (m NAP)")
+    def _gw_differences(self, point_water_head: pd.Series) -> pd.Series:
+        """
+        The differences between the point water head and the groundwater measurements, at the
+        dates of the measurements.
+        """
+        indices = np.searchsorted(self.date_range, self.gw_measurements.index)
+        return (
+            point_water_head.iloc[indices] - self.gw_measurements["head (m NAP)"].values
+        )
 
-        # Match and adjust with groundwater measurements if requested
-        if match_gw_measurements:
-            if not hasattr(self, "gw_measurements"):
-                raise ValueError("No groundwater measurements available to match.")
+    def _drift_readings(self, point_water_head: pd.Series) -> pd.DataFrame:
+        """
+        The differences between the point water head and the groundwater measurements, as
+        readings of a "DriftCorrection".
+        """
+        difference = self._gw_differences(point_water_head)
+        readings = pd.DataFrame(
+            {
+                "well_id": self.well_id,
+                "date": difference.index,
+                "difference": difference.to_numpy(dtype=np.float64),
+            }
+        )
+        if "weight" in self.gw_measurements.columns:
+            readings["weight"] = self.gw_measurements["weight"].to_numpy()
+        return readings
 
-            indices = np.searchsorted(self.date_range, self.gw_measurements.index)
+    def _drift_segments(self) -> pd.DatetimeIndex:
+        """
+        The starts of the periods of constant well geometry in the date range.
+        """
+        breakpoints = np.union1d(self._ztop.breakpoints, self._cable_length.breakpoints)
+        positions = np.unique(self.date_range.asi8.searchsorted(breakpoints[1:]))
+        positions = positions[(positions > 0) & (positions < len(self.date_range))]
+        return self.date_range[np.concatenate([[0], positions])]
 
-            if method == "last":
-                # Adjust using the last groundwater measurements
-                index = indices[-1]
-                difference = (
-                    point_water_head.iloc[index]
-                    - self.gw_measurements["head (m NAP)"].iloc[-1]
-                )
-                correction_factor = pd.Series(difference, index=self.date_range)
-
-            elif method == "penultimate":
-                # Adjust using the penultimate groundwater measurements
-                index = indices[-2]
-                difference = (
-                    point_water_head.iloc[index]
-                    - self.gw_measurements["head (m NAP)"].iloc[-2]
-                )
-                correction_factor = pd.Series(difference, index=self.date_range)
+    def _correction_factor(
+        self, point_water_head: pd.Series, method: str | DriftCorrection
+    ) -> pd.Series:
+        """
+        The correction factor of the point water head to match the groundwater measurements.
+        """
+        if isinstance(method, DriftCorrection) or method == "drift":
+            drift = DriftCorrection() if method == "drift" else method
+            parameters = drift.fit(
+                self._drift_readings(point_water_head),
+                {self.well_id: self._drift_segments()},
+            )
+            return pd.Series(
+                drift.evaluate(parameters.loc[self.well_id], self.date_range),
+                index=self.date_range,
+            )
 
-            elif method == "all":
-                # Adjust using all groundwater measurements (interpolated)
-                difference = (
-                    point_water_head.iloc[indices]
-                    - self.gw_measurements["head (m NAP)"].values
-                )
-                correction_factor = (
-                    difference.reindex(self.date_range)
-                    .interpolate(method="linear", axis=0)
-                    .ffill()
-                    .bfill()
-                )
-            else:
-                raise ValueError(
-                    f"Invalid method '{method}'. Use 'last, 'penultimate', or 'all'."
-                )
+        difference = self._gw_differences(point_water_head)
 
-            # Apply correction to the water head
-            point_water_head -= correction_factor
-            self.point_water_head = point_water_head.to_frame(
-                "point_water_head (m NAP)"
-            )
+        if method == "last":
+            # Adjust using the last groundwater measurements
+            return pd.Series(difference.iloc[-1], index=self.date_range)
+
+        elif method == "penultimate":
+            # Adjust using the penultimate groundwater measurements
+            return pd.Series(difference.iloc[-2], index=self.date_range)
 
-        self.calculate_fresh_water_head()
-        self.calculate_fresh_water_ref_head()
+        # Adjust using all groundwater measurements (interpolated)
+        return (
+            difference.reindex(self.date_range)
+            .interpolate(method="linear", axis=0)
+            .ffill()
+            .bfill()
+        )
 
-    def calculate_fresh_water_head(self):
-        fresh_water_head = (
-            self.water_density["water_density (kg/m3)"] / 1000
-        ) * self.point_water_head["point_water_head (m NAP)"] - (
-            (self.water_density["water_density (kg/m3)"] - 1000) / 1000
+    def calculate_fresh_water_head(
+        self, point_water_head: pd.Series = None, window: slice = slice(None)
+    ) -> pd.DataFrame:
+        """
+        Calculate the fresh water head from the (given) point water head, on a window of the
+        date range.
+        """
+        if point_water_head is None:
+            point_water_head = self._head("point_water_head")[
+                "point_water_head (m NAP)"
+            ]
+        water_density = self.water_density["water_density (kg/m3)"].iloc[window]
+
+        fresh_water_head = (water_density / 1000) * point_water_head.iloc[window] - (
+            (water_density - 1000) / 1000
         ) * self.elevation_head
 
-        self.fresh_water_head = fresh_water_head.to_frame("fresh_water_head (m NAP)")
+        return fresh_water_head.astype(self.dtype, copy=False).to_frame(
+            "fresh_water_head (m NAP)"
+        )
 
-    def calculate_fresh_water_ref_head(self):
+    def calculate_fresh_water_ref_head(
+        self, point_water_head: pd.Series = None, window: slice = slice(None)
+    ) -> pd.DataFrame:
+        """
+        Calculate the fresh water head at the reference level from the (given) point water
+        head, on a window of the date range.
+        """
+        if point_water_head is None:
+            point_water_head = self._head("point_water_head")[
+                "point_water_head (m NAP)"
+            ]
+        water_density = self.water_density["water_density (kg/m3)"].iloc[window]
 
         fresh_water_ref_head = (
             self.reference_level
-            + (self.water_density["water_density (kg/m3)"] / 1000)
-            * (self.point_water_head["point_water_head (m NAP)"] - self.elevation_head)
-            - (self.water_density["water_density (kg/m3)"] / 1000)
-            * (self.reference_level - self.elevation_head)
+            + (water_density / 1000)
+            * (point_water_head.iloc[window] - self.elevation_head)
+            - (water_density / 1000) * (self.reference_level - self.elevation_head)
         )
-        self.fresh_water_ref_head = fresh_water_ref_head.to_frame(
+        return fresh_water_ref_head.astype(self.dtype, copy=False).to_frame(
             "fresh_water_ref_head (m NAP)"
         )
 
@@ -314,58 +1025,254 @@ class MonitoringWell:
         after: str = None,
         before: str = None,
         between: list = None,
+        reason: str = None,
     ):
+        """
+        Drops periods of the derived heads: after or before a date ("DD-MM-YYYY"), and/or
+        between two dates (set to NaN). The drops are kept as an interval list (see
+        "exclusions") and applied to every (re)computation and export of the heads.
+        """
+        datetime_format = "%d-%m-%Y"
         if after is not None:
-            datetime_format = "%d-%m-%Y"
-            end_date = pd.to_datetime(after, format=datetime_format)
-            self.point_water_head = self.point_water_head.loc[:end_date]
-            self.fresh_water_head = self.fresh_water_head.loc[:end_date]
-            self.fresh_water_ref_head = self.fresh_water_ref_head.loc[:end_date]
-
+            self._drops.append(
+                ("after", pd.to_datetime(after, format=datetime_format), None, reason)
+            )
         if before is not None:
-            datetime_format = "%d-%m-%Y"
-            start_date = pd.to_datetime(before, format=datetime_format)
-            self.point_water_head = self.point_water_head.loc[start_date:]
-            self.fresh_water_head = self.fresh_water_head.loc[start_date:]
-            self.fresh_water_ref_head = self.fresh_water_ref_head.loc[start_date:]
-
+            self._drops.append(
+                ("before", pd.to_datetime(before, format=datetime_format), None, reason)
+            )
         if between is not None:
-            datetime_format = "%d-%m-%Y"
             start_date = pd.to_datetime(between[0], format=datetime_format)
             end_date = pd.to_datetime(between[1], format=datetime_format)
-            self.point_water_head.loc[start_date:end_date] = np.nan
-            self.fresh_water_head.loc[start_date:end_date] = np.nan
-            self.fresh_water_ref_head.loc[start_date:end_date] = np.nan
+            self._drops.append(("between", start_date, end_date, reason))
+        self._touch("drop")
 
-    def export_point_water_head(self, fdir: str):
-        export = pd.concat(
-            [
-                self.point_water_head[["point_water_head (m NAP)"]],
-                self.diver_data[["temperature (degC)"]],
-            ],
-            axis=1,
+    def apply_drop_rules(self, table: pd.DataFrame):
+        """
+        Drop the periods of a table of rules at once (e.g. the rules of this well from a
+        table of all wells), see "drop_data".
+
+        Parameters:
+        ----------
+        table : pd.DataFrame
+            A row per rule with the columns "kind" ("after", "before" or "between"), "date"
+            and "end_date" (the end of a "between" rule) as "DD-MM-YYYY" or timestamps,
+            and optionally "reason".
+        """
+        for rule in table.itertuples(index=False):
+            kind = rule.kind
+            if kind not in ("after", "before", "between"):
+                raise ValueError(
+                    f"Invalid kind '{kind}'. Use 'after', 'before' or 'between'."
+                )
+            reason = getattr(rule, "reason", None)
+            reason = None if pd.isna(reason) else reason
+            if kind == "between":
+                self.drop_data(between=[rule.date, rule.end_date], reason=reason)
+            else:
+                self.drop_data(**{kind: rule.date}, reason=reason)
+
+    @property
+    def exclusions(self) -> pd.DataFrame:
+        """
+        The dropped periods as an interval list, a row per rule with the columns of
+        "apply_drop_rules".
+        """
+        return pd.DataFrame(
+            self._drops, columns=["kind", "date", "end_date", "reason"]
+        ).astype({"date": "datetime64[ns]", "end_date": "datetime64[ns]"})
+
+    def _exclusion_mask(self) -> tuple[int, int, np.ndarray | None]:
+        """
+        The dropped periods on the date range, built once per change of the drops: the
+        positions of the first and after the last kept timestep ("before" and "after" rules)
+        and a boolean mask of the "between" rules (None without them).
+        """
+        key = self._versions["drop"]
+        if self._exclusion_layer is None or self._exclusion_layer[0] != key:
+            first, stop = 0, len(self.date_range)
+            bounds = np.zeros(len(self.date_range) + 1, dtype=np.int64)
+            for kind, date, end_date, _ in self._drops:
+                if kind == "after":
+                    stop = min(stop, self.date_range.searchsorted(date, side="right"))
+                elif kind == "before":
+                    first = max(first, self.date_range.searchsorted(date, side="left"))
+                else:
+                    bounds[self.date_range.searchsorted(date, side="left")] += 1
+                    bounds[self.date_range.searchsorted(end_date, side="right")] -= 1
+            mask = np.cumsum(bounds[:-1]) > 0
+            self._exclusion_layer = (key, (first, stop, mask if mask.any() else None))
+        return self._exclusion_layer[1]
+
+    def _apply_drops(self, head: pd.DataFrame) -> pd.DataFrame:
+        """
+        The head without the dropped periods: the "before" and "after" rules slice the head
+        (a view), only the "between" rules are set to NaN.
+        """
+        first, stop, mask = self._exclusion_mask()
+        head = head.iloc[first:stop]
+        if mask is not None and mask[first:stop].any():
+            head = head.where(~mask[first:stop, None])
+        return head
+
+    def head_flags(self, name: str = "point_water_head") -> pd.Series:
+        """
+        Return a flag per hour of a derived head: measured (0), interpolated (1), missing (2)
+        or dropped (3), from the gap index and the dropped periods.
+        """
+        flags = self.gap_index().flags(**self._interpolation())
+        flags[self._head(name).iloc[:, 0].isna().to_numpy()] = MISSING
+        first, stop, mask = self._exclusion_mask()
+        if mask is not None:
+            flags[mask] = DROPPED
+        flags[:first] = DROPPED
+        flags[stop:] = DROPPED
+        return pd.Series(flags, index=self.date_range, name="flag")
+
+    def _export_columns(
+        self, name: str, freq: str | None, flags: bool = False
+    ) -> list[pd.Series]:
+        """
+        The head "name" with the diver temperature, hourly or as means per period "freq"
+        (from the cached aggregates), and for hourly exports optionally the flags.
+        """
+        if freq is None:
+            head = getattr(self, name)[f"{name} (m NAP)"]
+            temperature = self.diver_data["temperature (degC)"]
+        else:
+            if flags:
+                raise ValueError("Flags are only exported with hourly values.")
+            head = self.aggregate(name, freq)["mean"].rename(f"{name} (m NAP)")
+            temperature = self.aggregate("temperature (degC)", freq)["mean"]
+        columns = [head, temperature.rename("temperature (degC)")]
+        if flags:
+            columns.append(self.head_flags(name))
+        return columns
+
+    def _export(
+        self,
+        name: str,
+        path: str | Path,
+        freq: str | None,
+        flags: bool,
+        metadata: bool,
+        format: str,
+        column: str | None = None,
+    ):
+        """
+        Write the export of the head "name" (its column renamed to "column") as csv, with
+        the metadata in a json file, or in a columnar format with the metadata in the file.
+        """
+        columns = self._export_columns(name, freq, flags)
+        if column is not None:
+            columns[0] = columns[0].rename(column)
+        if check_export_format(format) == "csv":
+            pd.concat(columns, axis=1).to_csv(path)
+            if metadata:
+                self._write_metadata(path, name)
+            return
+
+        # as the csv, all timestamps: the head without the dropped periods can be shorter
+        index = columns[0].index
+        for series in columns[1:]:
+            if not series.index.equals(index):
+                index = index.union(series.index)
+        write_columns(
+            path,
+            self.well_id,
+            index,
+            {
+                series.name: (
+                    series.to_numpy()
+                    if series.index.equals(index)
+                    else series.reindex(index).to_numpy()
+                )
+                for series in columns
+            },
+            format,
+            self.metadata(name) if metadata else None,
         )
-        export.to_csv(fdir + f"{self.well_id}.csv")
 
-    def export_fresh_water_head(self, path: str | Path, referenced: bool = True):
-        if referenced:
-            export = pd.concat(
-                [
-                    self.fresh_water_ref_head[["fresh_water_ref_head (m NAP)"]],
-                    self.diver_data[["temperature (degC)"]],
-                ],
-                axis=1,
+    def metadata(self, name: str | None = None) -> dict:
+        """
+        The metadata of the exported heads: the well id, the dropped periods and, for the
+        head "name", its summary statistics.
+        """
+        exclusions = [
+            {
+                "kind": kind,
+                "date": date.isoformat(),
+                "end_date": None if end_date is None else end_date.isoformat(),
+                "reason": reason,
+            }
+            for kind, date, end_date, reason in self._drops
+        ]
+        metadata = {"well_id": self.well_id, "exclusions": exclusions}
+        if name is not None:
+            metadata["summary"] = json.loads(
+                self.summary(name).to_json(date_format="iso", double_precision=15)
             )
-            export = export.rename(
-                columns={"fresh_water_ref_head (m NAP)": "fresh_water_head (m NAP)"}
+        return metadata
+
+    def _write_metadata(self, path: str | Path, name: str | None = None):
+        """
+        Write the metadata next to an exported file, as json with the same name.
+        """
+        Path(path).with_suffix(".json").write_text(
+            json.dumps(self.metadata(name), indent=1)
+        )
+
+    def export_point_water_head(
+        self,
+        fdir: str | Path,
+        freq: str = None,
+        flags: bool = False,
+        metadata: bool = True,
+        format: str = "csv",
+    ):
+        """
+        Export the point water head and the diver temperature to a file named after the
+        well in "fdir" (see "export_fresh_water_head").
+        """
+        self._export(
+            "point_water_head",
+            export_path(fdir, self.well_id, format),
+            freq,
+            flags,
+            metadata,
+            format,
+        )
+
+    def export_fresh_water_head(
+        self,
+        path: str | Path,
+        referenced: bool = True,
+        freq: str = None,
+        flags: bool = False,
+        metadata: bool = True,
+        format: str = "csv",
+    ):
+        """
+        Export the fresh water head (at the reference level if "referenced") and the diver
+        temperature to a csv file, hourly or as means per period "freq" ("1D", "W" or "M").
+        With "flags", a column flags the hourly values as measured (0), interpolated (1),
+        missing (2) or dropped (3). With "metadata", the dropped periods are written to a
+        json file with the same name.
+
+        The "format" "parquet", "feather" or "netcdf" writes compressed, typed columns
+        (e.g. float32 heads and uint8 flags) directly from the arrays of the well, with the
+        metadata in the file. For "parquet", "path" is the root of a dataset partitioned by
+        well id and year ("path/well_id=.../year=.../data.parquet"), shared by all wells.
+        """
+        if referenced:
+            self._export(
+                "fresh_water_ref_head",
+                path,
+                freq,
+                flags,
+                metadata,
+                format,
+                "fresh_water_head (m NAP)",
             )
-            export.to_csv(path)
         else:
-            export = pd.concat(
-                [
-                    self.fresh_water_head[["fresh_water_head (m NAP)"]],
-                    self.diver_data[["temperature (degC)"]],
-                ],
-                axis=1,
-            )
-            export.to_csv(path)
+            self._export("fresh_water_head", path, freq, flags, metadata, format)
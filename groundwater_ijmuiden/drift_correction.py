@@ -0,0 +1,246 @@
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from scipy.sparse.linalg import spsolve
+
+_YEAR = pd.Timedelta(days=365.25).value
+
+# the weights of iteratively reweighted least squares, the derivative of the loss rho(z) of
+# "scipy.optimize.least_squares" at z = (residual / f_scale)²
+_LOSSES = {
+    "linear": lambda z: np.ones_like(z),
+    "huber": lambda z: np.where(z <= 1, 1.0, 1 / np.sqrt(np.maximum(z, 1))),
+    "soft_l1": lambda z: 1 / np.sqrt(1 + z),
+    "cauchy": lambda z: 1 / (1 + z),
+}
+
+
+class DriftCorrection:
+
+    def __init__(
+        self,
+        loss: str = "huber",
+        f_scale: float = 0.02,
+        drift: bool = True,
+        drift_penalty: float = 0.1,
+        offset_penalty: float = 1e-6,
+        min_drift_readings: int = 3,
+        max_iterations: int = 50,
+    ):
+        """
+        Fits a piecewise offset and drift model of the difference between the point water
+        head and the groundwater measurements (handreadings), for many wells at once.
+
+        The date range of each well is split in segments (e.g. at the changes of the well
+        geometry, where a diver was re-hung), each with an offset (m) and a linear drift
+        (m/year). All segments of all wells are solved as one sparse weighted least-squares
+        problem, with a robust loss by iteratively reweighted least squares, so a single bad
+        handreading does not dominate. A drift is only fitted for segments with at least
+        "min_drift_readings" valid handreadings, the others get an offset only, so one bad
+        handreading near the end of a short segment can not tilt it. The penalty on the
+        drift keeps it at a realistic size (mm to cm per year): by default a drift of
+        1 cm/year costs as much as a residual of 3 mm, 10 cm/year as 3 cm. A small penalty
+        on the jump between the offsets of consecutive segments gives a segment without
+        handreadings the offsets of its neighbours. Wells without valid handreadings are
+        not corrected (NaN).
+
+        Attributes:
+        ----------
+        loss : str
+            "linear", "huber", "soft_l1" or "cauchy" (as "scipy.optimize.least_squares").
+        f_scale : float
+            The residual (m) from which the robust loss reduces the weight of a handreading.
+        drift : bool
+            Whether to fit a drift per segment, or only an offset.
+        drift_penalty : float
+            The weight of the penalty on the squared drift ((m/year)²), relative to the
+            weight of a squared residual (m²) of a handreading.
+        offset_penalty : float
+            The weight of the penalty on the jump between consecutive offsets.
+        min_drift_readings : int
+            The minimum number of valid handreadings in a segment to fit its drift.
+        max_iterations : int
+            The maximum number of reweighting iterations.
+        """
+        if loss not in _LOSSES:
+            raise ValueError(
+                f"Invalid loss '{loss}'. Use {', '.join(map(repr, _LOSSES))}."
+            )
+        self.loss = loss
+        self.f_scale = f_scale
+        self.drift = drift
+        self.drift_penalty = drift_penalty
+        self.offset_penalty = offset_penalty
+        self.min_drift_readings = min_drift_readings
+        self.max_iterations = max_iterations
+
+    def __repr__(self) -> str:
+        return (
+            f"DriftCorrection(loss={self.loss!r}, f_scale={self.f_scale}, "
+            f"drift={self.drift}, drift_penalty={self.drift_penalty}, "
+            f"offset_penalty={self.offset_penalty}, "
+            f"min_drift_readings={self.min_drift_readings})"
+        )
+
+    def fit(self, readings: pd.DataFrame, segments: dict) -> pd.DataFrame:
+        """
+        Fit the model of all wells at once.
+
+        Args:
+            readings (pd.DataFrame): A row per handreading with the columns "well_id",
+                "date", "difference" (point water head minus handreading, m) and
+                optionally "weight". Readings with a NaN difference are ignored.
+            segments (dict): The start dates (pd.DatetimeIndex) of the segments per well id,
+                the first is the start of the date range of the well.
+
+        Returns:
+            pd.DataFrame: The "offset" (m) and "drift" (m/year) per (well id, segment start).
+                The "residuals" and (robust) "weights" of the readings are stored as
+                attributes.
+        """
+        n_columns = 2 if self.drift else 1
+        well_ids = list(segments)
+        n_segments = np.array([len(segments[well_id]) for well_id in well_ids])
+        first_segment = np.concatenate([[0], np.cumsum(n_segments)[:-1]])
+        n_parameters = n_columns * n_segments.sum()
+
+        readings = readings[readings["difference"].notna()].reset_index(drop=True)
+        well = pd.Index(well_ids).get_indexer(readings["well_id"])
+        if (well < 0).any():
+            raise ValueError("Readings of wells without segments.")
+
+        # the segment of each reading and its time since the start of the segment
+        segment = np.empty(len(readings), dtype=np.int64)
+        elapsed = np.empty(len(readings))
+        dates = pd.DatetimeIndex(readings["date"]).asi8
+        for i, well_id in enumerate(well_ids):
+            starts = pd.DatetimeIndex(segments[well_id]).asi8
+            rows = well == i
+            local = np.maximum(
+                np.searchsorted(starts, dates[rows], side="right") - 1, 0
+            )
+            segment[rows] = first_segment[i] + local
+            elapsed[rows] = (dates[rows] - starts[local]) / _YEAR
+
+        rows = np.repeat(np.arange(len(readings)), n_columns)
+        columns = (n_columns * segment[:, None] + np.arange(n_columns)).ravel()
+        values = np.column_stack([np.ones(len(readings)), elapsed])[:, :n_columns]
+        design = sparse.csr_matrix(
+            (values.ravel(), (rows, columns)), shape=(len(readings), n_parameters)
+        )
+        penalties = self._penalties(n_segments, first_segment, n_columns)
+
+        # the parameters that are fitted, without the drift of segments with few readings
+        free = np.ones(n_parameters, dtype=bool)
+        if self.drift:
+            counts = np.bincount(segment, minlength=n_segments.sum())
+            free[2 * np.flatnonzero(counts < self.min_drift_readings) + 1] = False
+        design = design[:, free]
+        penalties = penalties[:, free]
+        normal_penalties = (penalties.T @ penalties).tocsc()
+
+        y = readings["difference"].to_numpy(dtype=np.float64)
+        weights = (
+            readings["weight"].to_numpy(dtype=np.float64)
+            if "weight" in readings
+            else np.ones(len(readings))
+        )
+        robust = np.ones(len(readings))
+        for _ in range(self.max_iterations):
+            weighted = design.multiply((weights * robust)[:, None]).tocsr()
+            solution = spsolve(
+                (design.T @ weighted).tocsc() + normal_penalties, weighted.T @ y
+            )
+            residuals = y - design @ solution
+            new_robust = _LOSSES[self.loss]((residuals / self.f_scale) ** 2)
+            converged = np.allclose(new_robust, robust, rtol=0, atol=1e-9)
+            robust = new_robust
+            if converged:
+                break
+
+        self.residuals = pd.Series(residuals, index=readings.index, name="residual")
+        self.weights = pd.Series(weights * robust, index=readings.index, name="weight")
+        self.readings = readings
+
+        parameters = np.zeros(n_parameters)
+        parameters[free] = solution
+        parameters = parameters.reshape(-1, n_columns)
+        index = pd.MultiIndex.from_tuples(
+            [(well_id, start) for well_id in well_ids for start in segments[well_id]],
+            names=["well_id", "start"],
+        )
+        result = pd.DataFrame(
+            {
+                "offset": parameters[:, 0],
+                "drift": parameters[:, 1] if self.drift else 0.0,
+            },
+            index=index,
+        )
+        # wells without valid readings are not corrected
+        without = ~pd.Index(well_ids).isin(readings["well_id"])
+        result.loc[pd.Index(well_ids)[without]] = np.nan
+        return result
+
+    def _penalties(
+        self, n_segments: np.ndarray, first_segment: np.ndarray, n_columns: int
+    ) -> sparse.csr_matrix:
+        """
+        The penalty rows: the drift of each segment, the jump between consecutive offsets
+        of a well and a negligible ridge on the offsets (so every system is solvable).
+        """
+        n_parameters = n_columns * n_segments.sum()
+        segments = np.arange(n_segments.sum())
+        blocks = [
+            sparse.csr_matrix(
+                (
+                    np.full(len(segments), np.sqrt(1e-12)),
+                    (segments, n_columns * segments),
+                ),
+                shape=(len(segments), n_parameters),
+            )
+        ]
+        if self.drift:
+            blocks.append(
+                sparse.csr_matrix(
+                    (
+                        np.full(len(segments), np.sqrt(self.drift_penalty)),
+                        (segments, 2 * segments + 1),
+                    ),
+                    shape=(len(segments), n_parameters),
+                )
+            )
+        # consecutive segments of the same well
+        following = np.setdiff1d(segments, first_segment)
+        rows = np.arange(len(following))
+        weight = np.sqrt(self.offset_penalty)
+        blocks.append(
+            sparse.csr_matrix(
+                (
+                    np.concatenate(
+                        [np.full(len(rows), weight), np.full(len(rows), -weight)]
+                    ),
+                    (
+                        np.concatenate([rows, rows]),
+                        np.concatenate(
+                            [n_columns * following, n_columns * (following - 1)]
+                        ),
+                    ),
+                ),
+                shape=(len(rows), n_parameters),
+            )
+        )
+        return sparse.vstack(blocks).tocsr()
+
+    @staticmethod
+    def evaluate(parameters: pd.DataFrame, dates: pd.DatetimeIndex) -> np.ndarray:
+        """
+        Return the correction of one well (its rows of the fitted parameters, indexed by
+        segment start) at "dates".
+        """
+        starts = pd.DatetimeIndex(parameters.index).asi8
+        segment = np.maximum(np.searchsorted(starts, dates.asi8, side="right") - 1, 0)
+        elapsed = (dates.asi8 - starts[segment]) / _YEAR
+        return (
+            parameters["offset"].to_numpy()[segment]
+            + parameters["drift"].to_numpy()[segment] * elapsed
+        )
@@ -0,0 +1,147 @@
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from .cache import _import_pyarrow, atomic_write
+
+EXPORT_FORMATS = ("csv", "parquet", "feather", "netcdf")
+_SUFFIXES = {"csv": ".csv", "feather": ".feather", "netcdf": ".nc"}
+# the key of the metadata (well id, dropped periods) in the schema of the columnar files
+_METADATA_KEY = b"groundwater_ijmuiden"
+
+
+def _import_parquet():
+    pa, _ = _import_pyarrow()
+    import pyarrow.parquet as pq
+
+    return pa, pq
+
+
+def _import_xarray():
+    try:
+        import xarray as xr
+    except ImportError as e:
+        raise ImportError(
+            "The netcdf export requires 'xarray' and 'netcdf4', install them with "
+            "'pixi add xarray netcdf4'."
+        ) from e
+    return xr
+
+
+def check_export_format(format: str) -> str:
+    if format not in EXPORT_FORMATS:
+        raise ValueError(
+            f"Invalid format '{format}'. Use {', '.join(map(repr, EXPORT_FORMATS))}."
+        )
+    return format
+
+
+def export_path(directory: str | Path, well_id: str, format: str) -> Path:
+    """
+    The path of the export of a well in a directory: a file named after the well, or for
+    "parquet" the directory itself (the root of the partitioned dataset).
+    """
+    if check_export_format(format) == "parquet":
+        return Path(directory)
+    return Path(directory) / f"{well_id}{_SUFFIXES[format]}"
+
+
+def _table(index: pd.DatetimeIndex, columns: dict, metadata: dict | None):
+    """
+    A pyarrow table of the columns (numpy arrays are wrapped without a copy) with a
+    "date" column and the metadata in its schema.
+    """
+    pa, _ = _import_pyarrow()
+    table = pa.table(
+        {"date": pa.array(index)}
+        | {name: pa.array(np.asarray(column)) for name, column in columns.items()}
+    )
+    if metadata is not None:
+        table = table.replace_schema_metadata({_METADATA_KEY: json.dumps(metadata)})
+    return table
+
+
+def _write_parquet(root: Path, well_id: str, table, index: pd.DatetimeIndex):
+    """
+    Write a table to a hive-partitioned dataset "root/well_id=.../year=.../data.parquet",
+    one zero-copy slice per year. The new partitions replace the previous ones of the
+    well, partitions of years that are no longer present are removed afterwards, so a
+    failed export leaves the previous data in place.
+    """
+    _, pq = _import_parquet()
+    well_dir = root / f"well_id={well_id}"
+
+    years = index.year.to_numpy()
+    bounds = np.concatenate([[0], np.flatnonzero(np.diff(years)) + 1, [len(years)]])
+    written = set()
+    for start, stop in zip(bounds[:-1], bounds[1:]):
+        if start == stop:
+            continue
+        year_dir = well_dir / f"year={years[start]}"
+        year_dir.mkdir(parents=True, exist_ok=True)
+        part = table.slice(start, stop - start)
+        try:
+            atomic_write(
+                year_dir / "data.parquet",
+                lambda tmp: pq.write_table(part, tmp, compression="zstd"),
+            )
+        except BaseException:
+            if not any(year_dir.iterdir()):
+                year_dir.rmdir()
+            raise
+        written.add(year_dir)
+
+    for old in well_dir.glob("year=*/data.parquet"):
+        if old.parent not in written:
+            old.unlink()
+            if not any(old.parent.iterdir()):
+                old.parent.rmdir()
+
+
+def write_columns(
+    path: str | Path,
+    well_id: str,
+    index: pd.DatetimeIndex,
+    columns: dict,
+    format: str,
+    metadata: dict | None = None,
+):
+    """
+    Write the columns of an export (e.g. a head, the temperature and the flags on the same
+    index) in a columnar format, without combining them in a DataFrame first.
+
+    Args:
+        path (str | Path): The file, or for "parquet" the root of the dataset partitioned
+            by well id and year.
+        well_id (str): The well id.
+        index (pd.DatetimeIndex): The timestamps, written as the "date" column.
+        columns (dict): The values (pd.Series or np.ndarray) per column name, typed as in
+            the well (e.g. float32 heads and uint8 flags).
+        format (str): "parquet", "feather" or "netcdf" (compressed with zstd, zstd and zlib).
+        metadata (dict, optional): Stored in the schema (the attributes for netcdf).
+    """
+    path = Path(path)
+    if check_export_format(format) == "csv":
+        raise ValueError("Use 'DataFrame.to_csv' for the csv export.")
+
+    if format == "netcdf":
+        xr = _import_xarray()
+        dataset = xr.Dataset(
+            {name: ("date", np.asarray(column)) for name, column in columns.items()},
+            coords={"date": index},
+            attrs={} if metadata is None else {"metadata": json.dumps(metadata)},
+        )
+        encoding = {name: {"zlib": True, "complevel": 4} for name in columns}
+        atomic_write(path, lambda tmp: dataset.to_netcdf(tmp, encoding=encoding))
+        return
+
+    table = _table(index, columns, metadata)
+    if format == "feather":
+        _, feather = _import_pyarrow()
+        atomic_write(
+            path, lambda tmp: feather.write_feather(table, tmp, compression="zstd")
+        )
+    else:
+        _write_parquet(path, well_id, table, index)
@@ -0,0 +1,200 @@
+import numpy as np
+import pandas as pd
+
+# flags of the values of a series, DROPPED marks the periods dropped from the heads
+MEASURED, INTERPOLATED, MISSING, DROPPED = 0, 1, 2, 3
+
+
+class GapIndex:
+
+    def __init__(self, missing: np.ndarray, index: pd.DatetimeIndex | None = None):
+        """
+        A run-length encoded index of the gaps (runs of missing values) of a series, built
+        once in O(n) and shared by the interpolation, the gap statistics and the export flags,
+        which then only work on the gaps instead of rescanning the values.
+
+        Attributes:
+        ----------
+        missing : np.ndarray
+            A boolean array, True where the series is missing (NaN).
+        index : pd.DatetimeIndex, optional
+            The regular (e.g. hourly) index of the series, to express gaps as durations.
+        """
+        missing = np.asarray(missing, dtype=bool)
+        self.n = len(missing)
+        self.index = index
+
+        # the gaps start where missing switches on and end where it switches off
+        edges = np.diff(missing.astype(np.int8), prepend=0, append=0)
+        self.starts = np.flatnonzero(edges == 1)
+        self.lengths = np.flatnonzero(edges == -1) - self.starts
+
+    @classmethod
+    def from_series(cls, series: pd.Series) -> "GapIndex":
+        return cls(series.isna().to_numpy(), series.index)
+
+    @property
+    def ends(self) -> np.ndarray:
+        """
+        The position after the last missing value of each gap.
+        """
+        return self.starts + self.lengths
+
+    @property
+    def step(self) -> pd.Timedelta:
+        if self.index is None:
+            raise ValueError("Gap durations need the (regular) index of the series.")
+        return pd.Timedelta(self.index.freq or self.index[1] - self.index[0])
+
+    def _steps(self, max_gap: int | str | pd.Timedelta) -> int:
+        """
+        The maximum gap in timesteps, "max_gap" is a number of timesteps or a duration.
+        """
+        if isinstance(max_gap, (int, np.integer)):
+            return int(max_gap)
+        return int(pd.Timedelta(max_gap) // self.step)
+
+    def window(self, window: slice) -> "GapIndex":
+        """
+        Return the gap index of a window of the series (the gaps clipped to the window).
+        """
+        start, stop, _ = window.indices(self.n)
+        gaps = GapIndex(np.zeros(0, dtype=bool))
+        gaps.n = max(stop - start, 0)
+        gaps.index = None if self.index is None else self.index[start:stop]
+        inside = (self.ends > start) & (self.starts < stop) & (start < stop)
+        gaps.starts = np.maximum(self.starts[inside], start) - start
+        gaps.lengths = np.minimum(self.ends[inside], stop) - start - gaps.starts
+        return gaps
+
+    def affected_from(self, position: int) -> int:
+        """
+        Return the first position whose interpolated value may depend on the values from
+        "position" on: the start of the gap running into "position", else "position".
+        """
+        i = np.searchsorted(self.starts, position - 1, side="right") - 1
+        if i >= 0 and self.ends[i] > position - 1:
+            return int(self.starts[i])
+        return position
+
+    def _filled(
+        self,
+        limit: int | None = None,
+        max_gap: int | str | pd.Timedelta | None = None,
+        fill_leading: bool = False,
+    ) -> np.ndarray:
+        """
+        The number of values filled at the start of each gap.
+        """
+        filled = self.lengths.copy()
+        if limit is not None:
+            filled = np.minimum(filled, limit)
+        if max_gap is not None:
+            filled[self.lengths > self._steps(max_gap)] = 0
+        leading = self.starts == 0
+        if not fill_leading:
+            filled[leading] = 0
+        # nothing to fill a series without any valid value from
+        filled[leading & (self.ends == self.n)] = 0
+        return filled
+
+    def interpolate(
+        self,
+        values: np.ndarray,
+        limit: int | None = None,
+        max_gap: int | str | pd.Timedelta | None = None,
+        fill_leading: bool = False,
+    ) -> np.ndarray:
+        """
+        Fill the gaps of "values" linearly between the surrounding valid values (the same
+        arithmetic as pandas' "interpolate('linear')"), a gap at the end with the last valid
+        value.
+
+        Args:
+            values (np.ndarray): The values of the series, with this gap index.
+            limit (int, optional): Fill at most "limit" values at the start of each gap.
+            max_gap (int | str | pd.Timedelta, optional): Only fill gaps up to this number
+                of timesteps or duration (e.g. "6h"), longer gaps are kept.
+            fill_leading (bool, optional): Fill a gap at the start with the first valid
+                value. Defaults to False.
+
+        Returns:
+            np.ndarray: A copy of "values" with the gaps filled.
+        """
+        filled = self._filled(limit, max_gap, fill_leading)
+        gap = np.repeat(np.arange(len(filled)), filled)
+        positions = (
+            np.arange(len(gap)) - np.repeat(np.cumsum(filled) - filled, filled)
+        ) + self.starts[gap]
+
+        before = self.starts[gap] - 1
+        after = self.ends[gap]
+        interior = (before >= 0) & (after < self.n)
+        y = np.empty(len(gap), dtype=np.float64)
+        y[before < 0] = values[after[before < 0]]
+        y[after >= self.n] = values[before[after >= self.n]]
+
+        y_before = values[before[interior]].astype(np.float64)
+        y_after = values[after[interior]].astype(np.float64)
+        slope = (y_after - y_before) / (after[interior] - before[interior])
+        y[interior] = slope * (positions[interior] - before[interior]) + y_before
+
+        result = np.array(values, copy=True)
+        result[positions] = y
+        return result
+
+    def flags(
+        self,
+        limit: int | None = None,
+        max_gap: int | str | pd.Timedelta | None = None,
+        fill_leading: bool = False,
+    ) -> np.ndarray:
+        """
+        Return a uint8 flag per value: MEASURED (0), INTERPOLATED (1) or MISSING (2) after
+        "interpolate" with the same arguments.
+        """
+        flags = np.zeros(self.n, dtype=np.uint8)
+        filled = self._filled(limit, max_gap, fill_leading)
+        for value, first, last in (
+            (INTERPOLATED, self.starts, self.starts + filled),
+            (MISSING, self.starts + filled, self.ends),
+        ):
+            # mark the runs with +1/-1 at their bounds and accumulate
+            bounds = np.zeros(self.n + 1, dtype=np.int64)
+            np.add.at(bounds, first, 1)
+            np.add.at(bounds, last, -1)
+            flags[np.cumsum(bounds[:-1]) > 0] = value
+        return flags
+
+    def to_frame(self) -> pd.DataFrame:
+        """
+        Return the gaps with their first and last missing timestamp, length (in timesteps)
+        and duration.
+        """
+        frame = pd.DataFrame({"start": self.starts, "length": self.lengths})
+        if self.index is not None:
+            frame["start"] = self.index[self.starts]
+            frame["end"] = self.index[self.ends - 1]
+            frame["duration"] = self.lengths * self.step
+            frame = frame[["start", "end", "length", "duration"]]
+        return frame
+
+    def statistics(self) -> pd.Series:
+        """
+        Return the number of gaps, the number and fraction of missing values and the longest
+        and mean gap (in timesteps, or as durations with an index).
+        """
+        missing = int(self.lengths.sum())
+        longest = int(self.lengths.max()) if len(self.lengths) else 0
+        mean = missing / len(self.lengths) if len(self.lengths) else 0.0
+        if self.index is not None:
+            longest, mean = longest * self.step, mean * self.step
+        return pd.Series(
+            {
+                "gaps": len(self.lengths),
+                "missing": missing,
+                "missing_fraction": missing / self.n if self.n else np.nan,
+                "longest_gap": longest,
+                "mean_gap": mean,
+            }
+        )
@@ -0,0 +1,233 @@
+import json
+from collections.abc import Iterable
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from .cache import _import_pyarrow, atomic_write
+from .diver_processing import MonitoringWell
+
+HEAD_KINDS = ("point_water_head", "fresh_water_head", "fresh_water_ref_head")
+_ATTRIBUTES_FILE = "wells.json"
+_SUMMARY_FILE = "summary.json"
+_DATE_COLUMN = "date"
+
+
+class HeadStore:
+
+    def __init__(self, directory: str | Path):
+        """
+        One consolidated store of the processed heads of all wells, instead of a csv file
+        per well.
+
+        Each kind of head is a (time x well) table in an uncompressed Arrow (Feather) file,
+        with a column per well on the union of the date ranges. The files are memory mapped,
+        so reading a subset of wells and a time window is one call that only touches those
+        columns and rows. The attributes of the wells (the reference level, the elevation
+        head and e.g. the aquifer and location) and the summary statistics of their heads
+        (see "MonitoringWell.summary") are kept in json files, so overviews and maps read
+        them per well instead of the hourly heads.
+
+        Attributes:
+        ----------
+        directory : str | Path
+            The directory of the store.
+        """
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, kind: str) -> Path:
+        if kind not in HEAD_KINDS:
+            raise ValueError(
+                f"Invalid kind '{kind}'. Use {', '.join(map(repr, HEAD_KINDS))}."
+            )
+        return self.directory / f"{kind}.feather"
+
+    def _load_json(self, name: str) -> dict:
+        try:
+            return json.loads((self.directory / name).read_text())
+        except FileNotFoundError:
+            return {}
+
+    def _save_json(self, name: str, data: dict):
+        atomic_write(
+            self.directory / name,
+            lambda tmp: Path(tmp).write_text(json.dumps(data, indent=1)),
+        )
+
+    def _read_table(self, kind: str, columns: list | None = None):
+        _, feather = _import_pyarrow()
+        path = self._path(kind)
+        if not path.exists():
+            return None
+        return feather.read_table(path, columns=columns, memory_map=True)
+
+    def write(
+        self,
+        wells: Iterable[MonitoringWell],
+        attributes: pd.DataFrame | None = None,
+    ):
+        """
+        Add the heads of the wells to the store, replacing earlier heads of the same wells.
+        The heads are stored as the wells export them (without the dropped periods), with
+        their summary statistics.
+
+        Parameters:
+        ----------
+        wells : Iterable[MonitoringWell]
+            The processed wells.
+        attributes : pd.DataFrame, optional
+            Extra attributes per well id (index), e.g. the aquifer and the coordinates.
+        """
+        pa, feather = _import_pyarrow()
+        wells = list(wells)
+        well_ids = [well.well_id for well in wells]
+
+        summaries = self._load_json(_SUMMARY_FILE)
+        for kind in HEAD_KINDS:
+            summaries.setdefault(kind, {}).update(
+                {
+                    well.well_id: json.loads(
+                        well.summary(kind).to_json(
+                            date_format="iso", double_precision=15
+                        )
+                    )
+                    for well in wells
+                }
+            )
+            heads = pd.concat(
+                [getattr(well, kind).iloc[:, 0].rename(well.well_id) for well in wells],
+                axis=1,
+            )
+            table = self._read_table(kind)
+            if table is not None:
+                kept = [
+                    name
+                    for name in table.column_names
+                    if name != _DATE_COLUMN and name not in well_ids
+                ]
+                if kept:
+                    previous = (
+                        table.select([_DATE_COLUMN, *kept])
+                        .to_pandas()
+                        .set_index(_DATE_COLUMN)
+                    )
+                    heads = pd.concat([previous, heads], axis=1)
+            heads = heads.sort_index()
+
+            table = pa.table(
+                {_DATE_COLUMN: pa.array(heads.index)}
+                | {name: pa.array(heads[name].to_numpy()) for name in heads.columns}
+            )
+            atomic_write(
+                self._path(kind),
+                lambda tmp: feather.write_feather(
+                    table, tmp, compression="uncompressed"
+                ),
+            )
+
+        stored = self._load_json(_ATTRIBUTES_FILE)
+        for well in wells:
+            stored[well.well_id] = {
+                "reference_level": float(well.reference_level),
+                "elevation_head": float(well.elevation_head),
+                "start_date": well.date_range[0].isoformat(),
+                "end_date": well.date_range[-1].isoformat(),
+            }
+        if attributes is not None:
+            attributes = attributes[attributes.index.isin(list(stored))]
+            extra = json.loads(
+                attributes.to_json(
+                    orient="index", date_format="iso", double_precision=15
+                )
+            )
+            for well_id, values in extra.items():
+                stored[well_id].update(values)
+        self._save_json(_ATTRIBUTES_FILE, stored)
+        self._save_json(_SUMMARY_FILE, summaries)
+
+    @property
+    def well_ids(self) -> list:
+        return list(self._load_json(_ATTRIBUTES_FILE))
+
+    def attributes(self, wells: Iterable[str] | None = None) -> pd.DataFrame:
+        """
+        Return the attributes of the wells (all by default), a row per well id.
+        """
+        attributes = pd.DataFrame.from_dict(
+            self._load_json(_ATTRIBUTES_FILE), orient="index"
+        )
+        attributes.index.name = "well_id"
+        if wells is not None:
+            attributes = attributes.loc[list(wells)]
+        return attributes
+
+    def summary(
+        self, wells: Iterable[str] | None = None, kind: str = "fresh_water_ref_head"
+    ) -> pd.DataFrame:
+        """
+        Return the summary statistics of a kind of head of the wells (all by default), a
+        row per well id, without reading the heads.
+        """
+        self._path(kind)  # checks the kind
+        summary = pd.DataFrame.from_dict(
+            self._load_json(_SUMMARY_FILE).get(kind, {}), orient="index"
+        )
+        summary.index.name = "well_id"
+        if "last_date" in summary.columns:
+            summary["last_date"] = pd.to_datetime(summary["last_date"])
+        if wells is not None:
+            summary = summary.loc[list(wells)]
+        return summary
+
+    def read(
+        self,
+        wells: Iterable[str] | None = None,
+        start: str | pd.Timestamp | None = None,
+        end: str | pd.Timestamp | None = None,
+        kind: str = "fresh_water_ref_head",
+    ) -> pd.DataFrame:
+        """
+        Return the heads of the wells (all by default) from "start" up to and including
+        "end" as a (time x well) DataFrame. Only the selected columns and rows are read.
+
+        Parameters:
+        ----------
+        wells : Iterable[str], optional
+            The well ids.
+        start, end : str | pd.Timestamp, optional
+            The time window, as "dd-mm-yyyy" or timestamps. Defaults to all.
+        kind : str, optional
+            "point_water_head", "fresh_water_head" or "fresh_water_ref_head" (default, the
+            head of "MonitoringWell.export_fresh_water_head").
+        """
+        if not self._path(kind).exists():
+            raise FileNotFoundError(f"No {kind} in the head store {self.directory}.")
+        columns = None
+        if wells is not None:
+            columns = [_DATE_COLUMN, *wells]
+            missing = set(columns) - set(self._read_table(kind).column_names)
+            if missing:
+                raise ValueError(f"Wells {sorted(missing)} are not in the head store.")
+        table = self._read_table(kind, columns)
+
+        dates = table[_DATE_COLUMN].to_numpy()
+        first = 0 if start is None else np.searchsorted(dates, _timestamp(start))
+        stop = (
+            len(dates)
+            if end is None
+            else np.searchsorted(dates, _timestamp(end), side="right")
+        )
+        return (
+            table.slice(first, stop - first)
+            .to_pandas()
+            .set_index(_DATE_COLUMN)
+            .rename_axis(None)
+        )
+
+
+def _timestamp(date: str | pd.Timestamp) -> np.datetime64:
+    if isinstance(date, str):
+        date = pd.to_datetime(date, format="%d-%m-%Y")
+    return pd.Timestamp(date).to_datetime64()
@@ -1,72 +1,283 @@
-def EC_to_S(EC, t, p):  # t=ref, p=waterdruk
+import numpy as np
+
+FLOAT_DTYPES = ("float64", "float32")
+
+
+def check_float_dtype(dtype) -> np.dtype:
+    """Validate the float dtype of a dtype policy.
+
+    Args:
+    dtype: "float64" (default precision) or "float32" (half the memory).
+
+    Returns:
+    The numpy dtype.
+    """
+    dtype = np.dtype(dtype)
+    if dtype.name not in FLOAT_DTYPES:
+        raise ValueError(f"Invalid dtype '{dtype}'. Use 'float64' or 'float32'.")
+    return dtype
+
+
+# UNESCO (PSS-78) conductivity ratio to salinity, coefficients by increasing power
+_SALINITY_A = (0.008, -0.1692, 25.3851, 14.0941, -7.0261, 2.7081)  # a0 - a5
+_SALINITY_B = (0.0005, -0.0056, -0.0066, -0.0375, 0.0636, -0.0144)  # b0 - b5
+_SALINITY_C = (0.6766097, 2.00564e-2, 1.104259e-4, -6.9698e-7, 1.0031e-9)  # c0 - c4
+_SALINITY_D = (3.426e-2, 4.4464e-4, 4.215e-1, -3.107e-3)  # d1 - d4
+_SALINITY_E = (2.070e-5, -6.370e-10, 3.989e-15)  # e1 - e3
+
+# UNESCO (EOS-80) density of seawater at atmospheric pressure
+_DENSITY_A = (
+    999.842594,
+    6.793652e-2,
+    -9.095290e-3,
+    1.001685e-4,
+    -1.120083e-6,
+    6.536332e-9,
+)
+_DENSITY_B = (8.24493e-1, -4.0899e-3, 7.6438e-5, -8.2467e-7, 5.3875e-9)
+_DENSITY_C = (-5.72466e-3, 1.0227e-4, -1.6545e-6)
+_DENSITY_D = 4.8314e-4
+
+
+def _float_dtype(*values) -> np.dtype:
+    """The float dtype of a calculation, float32 only if all arrays are float32."""
+    dtype = np.result_type(*values)
+    return dtype if dtype in (np.float32, np.float64) else np.dtype("float64")
+
+
+def _horner(x: np.ndarray, coefficients: tuple, out: np.ndarray) -> np.ndarray:
+    """Evaluate a polynomial with Horner's scheme in place.
+
+    Args:
+    x: The values to evaluate the polynomial at.
+    coefficients: The coefficients, by increasing power.
+    out: The array to write the result to (broadcastable with "x").
+
+    Returns:
+    "out".
+    """
+    out[...] = coefficients[-1]
+    for coefficient in coefficients[-2::-1]:
+        out *= x
+        out += coefficient
+    return out
+
+
+def EC_to_S(EC, t, p, out=None):  # t=ref, p=waterdruk
     """Convert electrical conductivity to salinity. Units are in mS/cm.
     Returns the salinity without the correction of Hill.
 
+    The polynomials are evaluated with Horner's scheme in the dtype of the input (float32
+    or float64), for arrays of any (broadcastable) shape.
+
     Args:
     EC: The electrical conductivity in mS/cm.
     t: The temperature in degrees Celsius.
     p: The pressure of the water in decibar.
+    out: Optional array to write the salinity to.
 
     Returns:
     The salinity of the water in psu (g/kg).
     """
+    dtype = _float_dtype(EC, t, p)
+    ec, t, p = (np.asarray(x, dtype=dtype) for x in (EC, t, p))
+    shape = np.broadcast_shapes(ec.shape, t.shape, p.shape)
 
-    R = EC / 42.914
-    a = [0.008, -0.1692, 25.3851, 14.0941, -7.0261, 2.7081]  # a0 - a5
-    b = [0.0005, -0.0056, -0.0066, -0.0375, 0.0636, -0.0144]  # b0 - b5
-    c = [0.6766097, 2.00564e-2, 1.104259e-4, -6.9698e-7, 1.0031e-9]  # c0 - c4
-    d = [3.426e-2, 4.4464e-4, 4.215e-1, -3.107e-3]  # d1 - d4
-    e = [2.070e-5, -6.370e-10, 3.989e-15]  # e1 - e3
-
-    rt = sum(c[i] * t**i for i in range(len(c)))
-
-    Rp = 1 + (p * (e[0] + e[1] * p + e[2] * p**2)) / (
-        1 + d[0] * t + d[1] * t**2 + (d[2] + d[3] * t) * R
-    )
+    ratio = np.divide(ec, dtype.type(42.914), out=np.empty(shape, dtype))
+    rt = _horner(t, _SALINITY_C, np.empty(t.shape, dtype))
 
-    Rt = R / (Rp * rt)
+    # pressure correction Rp = 1 + p (e1 + e2 p + e3 p^2) / (1 + d1 t + d2 t^2 + (d3 + d4 t) R)
+    d1, d2, d3, d4 = _SALINITY_D
+    denominator = np.multiply(d3 + d4 * t, ratio, out=np.empty(shape, dtype))
+    denominator += 1 + t * (d1 + d2 * t)
+    rp = p * _horner(p, _SALINITY_E, np.empty(p.shape, dtype))
+    rp = np.divide(rp, denominator, out=denominator)
+    rp += 1
 
-    S = sum(
-        (a[i] + b[i] * (t - 15.0) / (1 + 0.0162 * (t - 15.0))) * (Rt ** (i / 2.0))
-        for i in range(len(a))
-    )
+    # square root of the conductivity ratio Rt = R / (Rp rt)
+    rp *= rt
+    x = np.divide(ratio, rp, out=ratio)
+    np.sqrt(x, out=x)
 
-    return S
+    # S = sum((a_i + b_i f(t)) Rt^(i/2)), one polynomial in sqrt(Rt)
+    temperature_factor = (t - 15.0) / (1 + 0.0162 * (t - 15.0))
+    coefficients = [
+        a + b * temperature_factor for a, b in zip(_SALINITY_A, _SALINITY_B)
+    ]
+    if out is None:
+        out = np.empty(shape, dtype)
+    salinity = _horner(x, coefficients, out)
+    return salinity if salinity.ndim else salinity[()]
 
 
-def S_to_rho(S, t):  # t in bodem
+def S_to_rho(S, t, out=None):  # t in bodem
     """salinity to density
 
+    The polynomials are evaluated with Horner's scheme in the dtype of the input (float32
+    or float64), for arrays of any (broadcastable) shape.
+
     Arguments:
     t -- the temperature in degrees celcius
     S = the salinity of the water in psu (g/kg)
+    out -- optional array to write the density to
 
     Returns:
 
     rho --  groundwater density in kg/m^3"""
+    dtype = _float_dtype(S, t)
+    salinity, t = np.asarray(S, dtype=dtype), np.asarray(t, dtype=dtype)
+    shape = np.broadcast_shapes(salinity.shape, t.shape)
+    if out is None:
+        out = np.empty(shape, dtype)
+
+    # rho = rho_f(t) + S (B(t) + C(t) sqrt(S) + d S)
+    term3 = _horner(t, _DENSITY_C, np.empty(t.shape, dtype)) * np.sqrt(salinity)
+    term3 += _DENSITY_D * salinity
+    term3 += _horner(t, _DENSITY_B, np.empty(t.shape, dtype))
+    np.multiply(term3, salinity, out=out)
+    out += _horner(t, _DENSITY_A, np.empty(t.shape, dtype))
+    return out if out.ndim else out[()]
+
+
+# Reference conditions of the field EC measurements (salinity calculation)
+REF_TEMPERATURE = 20  # °C
+REF_PRESSURE = 10  # dbar
+
+
+class DensityTable:
+    """Density of (ground)water precomputed on a regular grid, interpolated bilinearly.
+
+    An approximation of "S_to_rho" (or of "S_to_rho(EC_to_S(EC, 20, 10), t)") with a cost per
+    point independent of the density formula. The grid is regular in sqrt(x) and t, in which
+    the density is a smooth polynomial (S enters as S**1.5 and EC as sqrt(Rt)). Points
+    outside the grid (or NaN) are evaluated with the exact formulas. Build a table with
+    "DensityTable.salinity" or "DensityTable.conductivity".
+
+    The maximum interpolation error versus the exact UNESCO polynomials is in "max_error".
+    For the default grids (steps of 0.02 in sqrt(x) and 0.1 °C) it is below 1.1e-4 kg/m3,
+    a relative error of 1e-7 (~5e-6 m on a 50 m water column).
+    """
+
+    def __init__(
+        self,
+        x_max: float,
+        t_min: float,
+        t_max: float,
+        density,
+        sqrt_step: float = 0.02,
+        t_step: float = 0.1,
+    ):
+        """Args:
+        x_max: The maximum salinity (psu) or electrical conductivity (mS/cm) of the grid.
+        t_min: The minimum temperature (°C) of the grid.
+        t_max: The maximum temperature (°C) of the grid.
+        density: The function rho(x, t) tabulated on the grid.
+        sqrt_step: The grid step in sqrt(x).
+        t_step: The grid step in temperature (°C).
+        """
+        self.density = density
+        self.u = _grid(0.0, np.sqrt(x_max), sqrt_step)
+        self.t = _grid(t_min, t_max, t_step)
+        self.sqrt_step = sqrt_step
+        self.t_step = t_step
+        values = density(self.u[:, None] ** 2, self.t[None, :])
+
+        # per cell: rho = c0 + c1 ft + c2 fu + c3 fu ft, with the fractions within the cell
+        self._coefficients = [
+            np.ascontiguousarray(c).ravel()
+            for c in (
+                values[:-1, :-1],
+                values[:-1, 1:] - values[:-1, :-1],
+                values[1:, :-1] - values[:-1, :-1],
+                values[1:, 1:] - values[1:, :-1] - values[:-1, 1:] + values[:-1, :-1],
+            )
+        ]
+        self._max_error = None
+
+    @classmethod
+    def salinity(
+        cls, s_max: float = 42.0, t_min: float = 0.0, t_max: float = 30.0, **steps
+    ) -> "DensityTable":
+        """A table of rho(S, t), from fresh water to seawater (42 psu)."""
+        return cls(s_max, t_min, t_max, S_to_rho, **steps)
+
+    @classmethod
+    def conductivity(
+        cls, ec_max: float = 60.0, t_min: float = 0.0, t_max: float = 30.0, **steps
+    ) -> "DensityTable":
+        """A table of rho(EC, t), with the salinity from the EC (mS/cm) at the reference
+        conditions of the field measurements (20 °C, 10 dbar)."""
+        return cls(ec_max, t_min, t_max, _ec_to_rho, **steps)
+
+    @property
+    def max_error(self) -> float:
+        """The maximum absolute error (kg/m3) of the interpolation, evaluated at the centres
+        and edge midpoints of all grid cells (where bilinear interpolation errs most).
+        """
+        if self._max_error is None:
+            u = _grid(self.u[0], self.u[-1], self.sqrt_step / 2)
+            t = _grid(self.t[0], self.t[-1], self.t_step / 2)
+            x, t = np.broadcast_arrays(u[:, None] ** 2, t[None, :])
+            error = np.abs(self(x, t) - self.density(x, t))
+            self._max_error = float(np.max(error))
+        return self._max_error
+
+    def __call__(self, x, t, out=None):
+        """Return the interpolated density (kg/m3) at salinity or EC "x" and temperature "t".
+
+        Args:
+        x: The salinity (psu) or electrical conductivity (mS/cm), as for the table.
+        t: The temperature in degrees Celsius.
+        out: Optional array to write the density to.
+
+        Returns:
+        The density in kg/m3.
+        """
+        dtype = _float_dtype(x, t)
+        x, t = np.broadcast_arrays(
+            np.asarray(x, dtype=dtype), np.asarray(t, dtype=dtype)
+        )
+        if out is None:
+            out = np.empty(x.shape, dtype)
+
+        # fractional grid positions, points outside the grid are computed exactly
+        fu = np.sqrt(x, out=np.empty(x.shape, dtype))
+        fu /= self.sqrt_step
+        ft = np.subtract(t, self.t[0], out=np.empty(t.shape, dtype))
+        ft /= self.t_step
+        n_u, n_t = len(self.u) - 1, len(self.t) - 1
+        inside = None
+        if not (fu.min() >= 0 <= ft.min() and fu.max() <= n_u and ft.max() <= n_t):
+            inside = (fu >= 0) & (fu <= n_u) & (ft >= 0) & (ft <= n_t)
+            fu[~inside] = 0
+            ft[~inside] = 0
+
+        i = np.minimum(fu.astype(np.intp), n_u - 1)
+        j = np.minimum(ft.astype(np.intp), n_t - 1)
+        fu -= i
+        ft -= j
+        i *= n_t
+        i += j
+
+        c0, c1, c2, c3 = (c.take(i) for c in self._coefficients)
+        c3 *= fu
+        c3 += c1
+        c3 *= ft
+        c2 *= fu
+        c2 += c0
+        np.add(c2, c3, out=out)
+
+        if inside is not None:
+            outside = ~inside
+            out[outside] = self.density(x[outside], t[outside])
+        return out if out.ndim else out[()]
 
-    a = [
-        999.842594,
-        6.793652 * 10**-2,
-        -9.095290 * 10**-3,
-        1.001685 * 10**-4,
-        -1.120083 * 10**-6,
-        6.536332 * 10**-9,
-    ]
-    b = [
-        8.24493 * 10**-1,
-        -4.0899 * 10**-3,
-        7.6438 * 10**-5,
-        -8.2467 * 10**-7,
-        5.3875 * 10**-9,
-    ]
-    c = [-5.72466 * 10**-3, 1.0227 * 10**-4, -1.6545 * 10**-6]
-    d = 4.8314 * 10**-4
 
-    rho_f = sum(ai * t**i for i, ai in enumerate(a))
-    term2 = sum(bi * t**i for i, bi in enumerate(b))
-    term3 = sum(ci * t**i for i, ci in enumerate(c))
+def _grid(start: float, stop: float, step: float) -> np.ndarray:
+    """A regular grid from "start" to (at least) "stop"."""
+    return start + step * np.arange(int(np.ceil((stop - start) / step - 1e-9)) + 1)
 
-    rho = rho_f + term2 * S + term3 * S**1.5 + d * S**2
 
-    return rho
+def _ec_to_rho(ec, t):
+    """The density from EC (mS/cm) at the reference conditions and temperature t (°C)."""
+    return S_to_rho(EC_to_S(ec, REF_TEMPERATURE, REF_PRESSURE), t)
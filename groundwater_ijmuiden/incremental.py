@@ -0,0 +1,353 @@
+import hashlib
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from .cache import _import_pyarrow, atomic_write
+from .diver_processing import MonitoringWell
+from .drift_correction import DriftCorrection
+
+_STATE_VERSION = 1
+_UNCORRECTED_COLUMN = "uncorrected_point_water_head (m NAP)"
+
+
+def _first_difference(old: list, new: list) -> int | None:
+    """
+    Return the index of the first differing element of two lists (NaN equals NaN), or None.
+    """
+    for i, (a, b) in enumerate(zip(old, new)):
+        if json.dumps(a) != json.dumps(b):
+            return i
+    if len(old) != len(new):
+        return min(len(old), len(new))
+    return None
+
+
+def _month_digests(well: MonitoringWell, stop: int) -> dict:
+    """
+    Digests of the diver and barometer pressure per calendar month of the first "stop"
+    timesteps of the date range, keyed by the first timestamp of the month.
+    """
+    dates = well.date_range[:stop]
+    pressures = [
+        well.diver_data["diver_pressure (mH2O)"].to_numpy()[:stop],
+        well.barometer_data["air_pressure (mH2O)"].to_numpy()[:stop],
+    ]
+    months = dates.year * 12 + dates.month
+    bounds = np.concatenate([[0], np.flatnonzero(np.diff(months)) + 1, [stop]])
+    digests = {}
+    for start, end in zip(bounds[:-1], bounds[1:]):
+        digest = hashlib.blake2b(digest_size=16)
+        for pressure in pressures:
+            digest.update(pressure[start:end].tobytes())
+        digests[dates[start].isoformat()] = digest.hexdigest()
+    return digests
+
+
+class IncrementalProcessor:
+
+    def __init__(self, directory: str | Path):
+        """
+        Processes monitoring wells incrementally: the heads of each well are stored with the
+        state they were computed from, and on the next run only the timesteps affected by
+        changed or new inputs are recomputed.
+
+        The saved state of a well holds the last processed timestamp, digests of the diver
+        and barometer pressure per month, the water density anchors (at the EC measurements),
+        the geometry breakpoints and the correction factors at the groundwater measurements.
+        Appended diver data only recomputes the new window (and the gap filled at the end of
+        the previous run), a new handreading with method "all" recomputes from the previous
+        handreading and with "last", "penultimate" or "drift" the whole record. The results
+        are identical to processing the full record.
+
+        Attributes:
+        ----------
+        directory : str | Path
+            The directory to store the state and heads of the wells in.
+        """
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def _paths(self, well_id: str) -> tuple[Path, Path]:
+        return (
+            self.directory / f"{well_id}.json",
+            self.directory / f"{well_id}.feather",
+        )
+
+    def load(self, well_id: str) -> tuple[dict | None, pd.DataFrame | None]:
+        """
+        Return the saved state and heads of a well, or (None, None) if it was not processed.
+        """
+        path_state, path_heads = self._paths(well_id)
+        try:
+            state = json.loads(path_state.read_text())
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None, None
+        if state.get("version") != _STATE_VERSION or not path_heads.exists():
+            return None, None
+        _import_pyarrow()
+        return state, pd.read_feather(path_heads)
+
+    def invalidate(self, well_id: str):
+        """
+        Remove the saved state of a well, so it is fully processed on the next run.
+        """
+        for path in self._paths(well_id):
+            path.unlink(missing_ok=True)
+
+    @staticmethod
+    def _settings(
+        well: MonitoringWell, match_gw_measurements: bool, method: str, max_gap
+    ) -> dict:
+        return {
+            "dtype": str(well.dtype),
+            "start": well.date_range[0].isoformat(),
+            "reference_level": float(well.reference_level),
+            "elevation_head": float(well.elevation_head),
+            "match_gw_measurements": bool(match_gw_measurements),
+            "method": str(method) if match_gw_measurements else None,
+            "max_gap": None if max_gap is None else str(max_gap),
+        }
+
+    @staticmethod
+    def _geometry(well: MonitoringWell) -> dict:
+        return {
+            steps.name: [
+                [int(date), float(value)]
+                for date, value in zip(steps.breakpoints, steps.values)
+            ]
+            for steps in (well._ztop, well._cable_length)
+        }
+
+    @staticmethod
+    def _density_anchors(well: MonitoringWell) -> list:
+        if not hasattr(well, "ec_measurements"):
+            return []
+        dates = well.ec_measurements.index
+        dates = dates[dates.isin(well.date_range)]
+        density = well.water_density["water_density (kg/m3)"]
+        return [[date.isoformat(), float(density.at[date])] for date in dates]
+
+    def _first_changed(
+        self, well: MonitoringWell, state: dict | None, settings: dict
+    ) -> int:
+        """
+        Return the first position of the date range affected by a changed input.
+        """
+        if state is None or state["settings"] != settings:
+            return 0
+
+        date_range = well.date_range
+        stop = date_range.searchsorted(pd.Timestamp(state["last_timestamp"])) + 1
+        if stop > len(date_range):
+            return 0
+        candidates = [stop]
+
+        # the gap after the last value was filled with that value, recompute it
+        if state["last_valid"] is not None:
+            candidates.append(
+                date_range.searchsorted(pd.Timestamp(state["last_valid"]))
+            )
+
+        # diver or barometer data changed in the processed period
+        digests = _month_digests(well, stop)
+        for month, digest in digests.items():
+            if state["digests"].get(month) != digest:
+                candidates.append(date_range.searchsorted(pd.Timestamp(month)))
+                break
+
+        # geometry breakpoints changed
+        geometry = json.loads(json.dumps(self._geometry(well)))
+        for name, breakpoints in geometry.items():
+            old = state["geometry"][name]
+            i = _first_difference(old, breakpoints)
+            if i is not None:
+                date = min(
+                    steps[i][0] for steps in (old, breakpoints) if i < len(steps)
+                )
+                candidates.append(date_range.asi8.searchsorted(date))
+
+        # water density anchors changed, the density is interpolated between anchors
+        anchors = json.loads(json.dumps(self._density_anchors(well)))
+        i = _first_difference(state["density_anchors"], anchors)
+        if i is not None:
+            candidates.append(self._previous_anchor(date_range, anchors[:i]))
+
+        return min(candidates)
+
+    def _first_changed_correction(
+        self,
+        well: MonitoringWell,
+        state: dict | None,
+        corrections: list,
+        method: str | DriftCorrection,
+    ) -> int:
+        """
+        Return the first position of the date range affected by changed correction factors.
+        """
+        if state is None:
+            return 0
+        old = state["corrections"]
+        if isinstance(method, DriftCorrection) or method == "drift":
+            # the drift is fitted to all (weighted) corrections, per period of constant
+            # geometry
+            geometry = json.loads(json.dumps(self._geometry(well)))
+            if (
+                json.dumps(old) != json.dumps(corrections)
+                or state["geometry"] != geometry
+                or state.get("weights") != self._weights(well)
+            ):
+                return 0
+            return len(well.date_range)
+        if method in ("last", "penultimate"):
+            selected = -1 if method == "last" else -2
+            if len(old) < -selected or json.dumps(old[selected]) != json.dumps(
+                corrections[selected]
+            ):
+                return 0
+            return len(well.date_range)
+
+        i = _first_difference(old, corrections)
+        if i is None:
+            return len(well.date_range)
+        return self._previous_anchor(well.date_range, corrections[:i])
+
+    @staticmethod
+    def _weights(well: MonitoringWell) -> list | None:
+        if "weight" not in well.gw_measurements.columns:
+            return None
+        return [float(weight) for weight in well.gw_measurements["weight"]]
+
+    @staticmethod
+    def _previous_anchor(date_range: pd.DatetimeIndex, anchors: list) -> int:
+        """
+        Return the position of the last valid [date, value] anchor, values are interpolated
+        from there on to the next anchor. Before the first anchor, the value is back-filled.
+        """
+        valid = [date for date, value in anchors if not np.isnan(value)]
+        return date_range.searchsorted(pd.Timestamp(valid[-1])) if valid else 0
+
+    def process(
+        self,
+        well: MonitoringWell,
+        match_gw_measurements: bool = False,
+        method: str | DriftCorrection = "last",
+        max_gap: int | str | pd.Timedelta | None = None,
+    ) -> pd.Timestamp | None:
+        """
+        Perform the barometric compensation of a well (see
+        "MonitoringWell.barometric_compensation"), recomputing only the timesteps affected
+        by changes since the previous run. The heads are assigned to the well and saved with
+        its state.
+
+        Returns the first recomputed timestamp, or None if nothing changed.
+        """
+        well.barometric_compensation(match_gw_measurements, method, max_gap)
+        state, heads = self.load(well.well_id)
+        settings = self._settings(well, match_gw_measurements, method, max_gap)
+        date_range = well.date_range
+
+        # a gap running into the first changed timestep is interpolated towards it
+        start = well.gap_index().affected_from(
+            self._first_changed(well, state, settings)
+        )
+        if start:
+            heads = heads.set_axis(date_range[: len(heads)])
+
+        # the uncorrected point water head, computed on the window from one step earlier
+        window = well._uncorrected_point_water_head(slice(max(start - 1, 0), None))
+        uncorrected = pd.Series(
+            np.concatenate(
+                [
+                    heads[_UNCORRECTED_COLUMN].to_numpy()[:start] if start else [],
+                    window.to_numpy()[1 if start else 0 :],
+                ]
+            ).astype(well.dtype),
+            index=date_range,
+        )
+
+        corrections = []
+        correction_start = start
+        if match_gw_measurements:
+            differences = well._gw_differences(uncorrected)
+            corrections = json.loads(
+                json.dumps(
+                    [
+                        [date.isoformat(), float(value)]
+                        for date, value in zip(differences.index, differences)
+                    ]
+                )
+            )
+            correction_start = min(
+                start, self._first_changed_correction(well, state, corrections, method)
+            )
+
+        # the corrected and fresh water heads, from the first affected timestep
+        point_water_head = uncorrected.iloc[correction_start:].copy()
+        if match_gw_measurements:
+            correction_factor = well._correction_factor(uncorrected, method)
+            point_water_head -= correction_factor.iloc[correction_start:].astype(
+                well.dtype, copy=False
+            )
+        if correction_start:
+            point_water_head = pd.concat(
+                [
+                    heads["point_water_head (m NAP)"].iloc[:correction_start],
+                    point_water_head,
+                ]
+            )
+
+        window = slice(correction_start, None)
+        new_heads = pd.concat(
+            [
+                uncorrected.to_frame(_UNCORRECTED_COLUMN),
+                point_water_head.to_frame("point_water_head (m NAP)"),
+                self._concat(
+                    heads,
+                    well.calculate_fresh_water_head(point_water_head, window),
+                    correction_start,
+                ),
+                self._concat(
+                    heads,
+                    well.calculate_fresh_water_ref_head(point_water_head, window),
+                    correction_start,
+                ),
+            ],
+            axis=1,
+        )
+
+        for column in new_heads.columns[1:]:
+            setattr(well, column.split(" (")[0], new_heads[[column]])
+
+        valid = uncorrected.last_valid_index()
+        state = {
+            "version": _STATE_VERSION,
+            "settings": settings,
+            "last_timestamp": date_range[-1].isoformat(),
+            "last_valid": None if valid is None else valid.isoformat(),
+            "digests": _month_digests(well, len(date_range)),
+            "geometry": self._geometry(well),
+            "density_anchors": self._density_anchors(well),
+            "corrections": corrections,
+            "weights": self._weights(well) if match_gw_measurements else None,
+        }
+        self._save(well.well_id, state, new_heads)
+
+        if correction_start >= len(date_range):
+            return None
+        return date_range[correction_start]
+
+    @staticmethod
+    def _concat(heads: pd.DataFrame | None, window: pd.DataFrame, start: int):
+        if not start:
+            return window
+        return pd.concat([heads[window.columns].iloc[:start], window])
+
+    def _save(self, well_id: str, state: dict, heads: pd.DataFrame):
+        _import_pyarrow()
+        path_state, path_heads = self._paths(well_id)
+        heads = heads.reset_index(drop=True)
+        atomic_write(path_heads, lambda tmp: heads.to_feather(tmp))
+        atomic_write(path_state, lambda tmp: Path(tmp).write_text(json.dumps(state)))
@@ -0,0 +1,265 @@
+from collections.abc import Iterable
+
+import numpy as np
+import pandas as pd
+
+from .diver_processing import MonitoringWell
+from .drift_correction import DriftCorrection
+
+GRAVITATIONAL_ACCELERATION = 9.80665  # m/s²
+
+_HEAD_COLUMNS = {
+    "point_water_head": "point_water_head (m NAP)",
+    "fresh_water_head": "fresh_water_head (m NAP)",
+    "fresh_water_ref_head": "fresh_water_ref_head (m NAP)",
+}
+
+
+class MonitoringNetwork:
+
+    def __init__(self, wells: Iterable[MonitoringWell]):
+        """
+        All monitoring wells of a network processed at once, as aligned time x well arrays.
+
+        The inputs of the wells (diver pressure, barometer, water density and geometry) are
+        placed in 2-D NumPy arrays on the union of the date ranges of the wells, so the heads
+        of the whole network are computed in single broadcasted operations. The results are
+        identical to "MonitoringWell.barometric_compensation" per well. The wells should have
+        their barometer, diver data and water density added.
+
+        Attributes:
+        ----------
+        wells : Iterable[MonitoringWell]
+            The monitoring wells of the network, with unique well ids and the same dtype.
+        """
+        self.wells = {well.well_id: well for well in wells}
+        if not self.wells:
+            raise ValueError("A monitoring network needs at least one well.")
+        dtypes = {well.dtype for well in self.wells.values()}
+        if len(dtypes) > 1:
+            raise ValueError(
+                f"The wells have different dtypes {sorted(map(str, dtypes))}."
+            )
+        self.dtype = dtypes.pop()
+        self.well_ids = list(self.wells)
+
+        starts = [well.date_range[0] for well in self.wells.values()]
+        ends = [well.date_range[-1] for well in self.wells.values()]
+        self.date_range = pd.date_range(min(starts), max(ends), freq="h")
+
+        # position of the date range of each well in the network date range
+        self._slices = {}
+        for well_id, well in self.wells.items():
+            start = self.date_range.get_loc(well.date_range[0])
+            self._slices[well_id] = slice(start, start + len(well.date_range))
+
+        self.diver_pressure = self._stack(
+            lambda well: well.diver_data["diver_pressure (mH2O)"].to_numpy()
+        )
+        self.air_pressure = self._stack(
+            lambda well: well.barometer_data["air_pressure (mH2O)"].to_numpy()
+        )
+        self.water_density = self._stack(
+            lambda well: well.water_density["water_density (kg/m3)"].to_numpy()
+        )
+        self.ztop = self._stack(lambda well: well._ztop.evaluate(well.date_range))
+        self.cable_length = self._stack(
+            lambda well: well._cable_length.evaluate(well.date_range)
+        )
+        self.elevation_head = np.array(
+            [well.elevation_head for well in self.wells.values()], dtype=np.float64
+        )
+        self.reference_level = np.array(
+            [well.reference_level for well in self.wells.values()], dtype=np.float64
+        )
+
+    def _stack(self, values) -> np.ndarray:
+        """
+        Place a series of each well in a (time x well) array, NaN outside its date range.
+        """
+        array = np.full(
+            (len(self.date_range), len(self.wells)), np.nan, dtype=self.dtype
+        )
+        for i, (well_id, well) in enumerate(self.wells.items()):
+            array[self._slices[well_id], i] = values(well)
+        return array
+
+    def barometric_compensation(
+        self,
+        match_gw_measurements: bool | dict = False,
+        method: str | dict = "last",
+        max_gap: int | str | pd.Timedelta | None = None,
+    ):
+        """
+        Perform barometric compensation for all wells and calculate the point water, fresh
+        water and fresh water reference heads. See "MonitoringWell.barometric_compensation".
+
+        Parameters
+        ----------
+        match_gw_measurements : bool | dict, optional
+            Whether to match the heads with the groundwater measurements of the wells, for all
+            wells or per well id (missing wells are not matched). Defaults to "False".
+        method : str | DriftCorrection | dict, optional
+            The matching method "last", "penultimate", "all" or "drift" (or a
+            "DriftCorrection"), for all wells or per well id. The wells matched with the same
+            drift correction are fitted at once, as one sparse least-squares problem; the
+            fitted parameters are stored in "drift_parameters". Defaults to "last".
+        max_gap : int | str | pd.Timedelta, optional
+            Interpolate gaps up to this number of timesteps or duration entirely. Defaults to
+            "None": only the first missing value of each gap is interpolated.
+        """
+        # Calculate water pressure and the water column height for the whole network
+        water_pressure = self.diver_pressure - self.air_pressure
+        water_column = (9806.65 * water_pressure) / (
+            self.water_density * GRAVITATIONAL_ACCELERATION
+        )
+        point_water_head = self.ztop - self.cable_length + water_column
+
+        self._compensation = {}
+        drift_wells = {}
+        for i, (well_id, well) in enumerate(self.wells.items()):
+            match = (
+                match_gw_measurements.get(well_id, False)
+                if isinstance(match_gw_measurements, dict)
+                else match_gw_measurements
+            )
+            well_method = (
+                method.get(well_id, "last") if isinstance(method, dict) else method
+            )
+            self._compensation[well_id] = (match, well_method, max_gap)
+
+            # the gaps of the well, interpolated as in "MonitoringWell"
+            well_slice = self._slices[well_id]
+            interpolation = {"limit": 1} if max_gap is None else {"max_gap": max_gap}
+            point_water_head[well_slice, i] = well.gap_index().interpolate(
+                point_water_head[well_slice, i], **interpolation
+            )
+            if match and (
+                isinstance(well_method, DriftCorrection) or well_method == "drift"
+            ):
+                drift_wells.setdefault(
+                    "drift" if well_method == "drift" else well_method, []
+                ).append(well_id)
+            elif match:
+                point_water_head[well_slice, i] -= self._correction_factor(
+                    well_id, point_water_head[well_slice, i], well_method
+                )
+
+        self.drift_parameters = pd.concat(
+            [
+                self._drift_correction(
+                    DriftCorrection() if drift == "drift" else drift,
+                    well_ids,
+                    point_water_head,
+                )
+                for drift, well_ids in drift_wells.items()
+            ]
+            or [pd.DataFrame(columns=["offset", "drift"])]
+        )
+        self.point_water_head = point_water_head
+
+        density = self.water_density / 1000
+        elevation_head = self.elevation_head.astype(self.dtype)
+        self.fresh_water_head = (
+            density * point_water_head
+            - ((self.water_density - 1000) / 1000) * elevation_head
+        )
+        self.fresh_water_ref_head = (
+            self.reference_level.astype(self.dtype)
+            + density * (point_water_head - elevation_head)
+            - density * (self.reference_level - self.elevation_head).astype(self.dtype)
+        )
+
+    def _drift_correction(
+        self, drift: DriftCorrection, well_ids: list, point_water_head: np.ndarray
+    ) -> pd.DataFrame:
+        """
+        Fit the drift correction of the wells at once and subtract it from their point water
+        heads (in place). Returns the fitted parameters.
+        """
+        readings, segments = [], {}
+        for well_id in well_ids:
+            well = self.wells[well_id]
+            if not hasattr(well, "gw_measurements"):
+                raise ValueError(
+                    f"No groundwater measurements available to match for well '{well_id}'."
+                )
+            column = point_water_head[
+                self._slices[well_id], self.well_ids.index(well_id)
+            ]
+            readings.append(
+                well._drift_readings(pd.Series(column, index=well.date_range))
+            )
+            segments[well_id] = well._drift_segments()
+
+        parameters = drift.fit(pd.concat(readings, ignore_index=True), segments)
+        for well_id in well_ids:
+            well = self.wells[well_id]
+            correction = drift.evaluate(parameters.loc[well_id], well.date_range)
+            point_water_head[
+                self._slices[well_id], self.well_ids.index(well_id)
+            ] -= correction.astype(self.dtype)
+        return parameters
+
+    def _correction_factor(
+        self, well_id: str, point_water_head: np.ndarray, method: str
+    ) -> np.ndarray | np.floating:
+        well = self.wells[well_id]
+        if not hasattr(well, "gw_measurements"):
+            raise ValueError(
+                f"No groundwater measurements available to match for well '{well_id}'."
+            )
+
+        indices = np.searchsorted(well.date_range, well.gw_measurements.index)
+        gw_heads = well.gw_measurements["head (m NAP)"].to_numpy()
+
+        if method == "last":
+            return point_water_head[indices[-1]] - gw_heads[-1]
+        elif method == "penultimate":
+            return point_water_head[indices[-2]] - gw_heads[-2]
+        elif method == "all":
+            difference = point_water_head[indices] - gw_heads
+            known = ~np.isnan(difference)
+            if not known.any():
+                return np.full(len(point_water_head), np.nan, dtype=self.dtype)
+            correction_factor = np.interp(
+                np.arange(len(point_water_head)),
+                indices[known],
+                difference[known].astype(np.float64),
+            )
+            return correction_factor.astype(self.dtype)
+        else:
+            raise ValueError(
+                f"Invalid method '{method}'. Use 'last, 'penultimate', 'all' or "
+                "'drift'."
+            )
+
+    def heads(self, kind: str = "fresh_water_ref_head") -> pd.DataFrame:
+        """
+        Return the computed heads of all wells as a (time x well) DataFrame, "kind" is
+        "point_water_head", "fresh_water_head" or "fresh_water_ref_head".
+        """
+        if kind not in _HEAD_COLUMNS:
+            raise ValueError(
+                f"Invalid kind '{kind}'. Use {', '.join(map(repr, _HEAD_COLUMNS))}."
+            )
+        return pd.DataFrame(
+            getattr(self, kind),
+            index=self.date_range,
+            columns=pd.Index(self.well_ids, name="well_id"),
+        )
+
+    def assign_to_wells(self):
+        """
+        Store the computed heads as attributes of the wells, as if each well was processed by
+        "MonitoringWell.barometric_compensation" (e.g. to use "drop_data" and the exports).
+        """
+        for i, (well_id, well) in enumerate(self.wells.items()):
+            well_slice = self._slices[well_id]
+            well._compensation = self._compensation[well_id]
+            well._touch("compensation")
+            for kind, column in _HEAD_COLUMNS.items():
+                head = pd.DataFrame(
+                    {column: getattr(self, kind)[well_slice, i]}, index=well.date_range
+                )
+                setattr(well, kind, head)
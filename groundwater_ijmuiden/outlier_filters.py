@@ -0,0 +1,288 @@
+from collections.abc import Iterable, Iterator
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+from scipy import stats
+
+# rows of sliding windows sorted at once, bounds the temporary memory of the rolling filters
+_BLOCK_SIZE = 65536
+
+
+def _rolling_median(windows: np.ndarray) -> np.ndarray:
+    """
+    The median of each row of (strided) windows, ignoring NaN (NaN for empty windows).
+    """
+    medians = np.empty(len(windows))
+    rows = np.arange(min(len(windows), _BLOCK_SIZE))
+    for start in range(0, len(windows), _BLOCK_SIZE):
+        block = np.sort(windows[start : start + _BLOCK_SIZE], axis=1)  # NaN sort last
+        n = block.shape[1] - np.isnan(block).sum(axis=1)
+        r = rows[: len(block)]
+        low = block[r, np.maximum(n - 1, 0) // 2]
+        high = block[r, np.minimum(n // 2, block.shape[1] - 1)]
+        median = (low + high) / 2
+        median[n == 0] = np.nan
+        medians[start : start + len(block)] = median
+    return medians
+
+
+class OutlierRule:
+    """
+    A rule rejecting samples of a series. Local rules decide on a sample from the "context"
+    samples before and after it; global rules ("is_global") need statistics of the full
+    record, accumulated with "accumulate" before "reject" is called.
+    """
+
+    name = "rule"
+    context = 0
+    is_global = False
+
+    def reject(self, padded: np.ndarray) -> np.ndarray:
+        """
+        Return a boolean mask of the rejected samples of "padded[context:-context]", the
+        values with "context" samples (or NaN beyond the record) on each side.
+        """
+        raise NotImplementedError
+
+
+class MinimumRule(OutlierRule):
+
+    name = "minimum"
+
+    def __init__(self, minimum: float = 11.0):
+        """
+        Rejects samples not above "minimum" (mH2O), e.g. a diver above the water table, and
+        missing samples.
+        """
+        self.minimum = minimum
+
+    def reject(self, padded: np.ndarray) -> np.ndarray:
+        return ~(padded > self.minimum)
+
+
+class ZScoreRule(OutlierRule):
+
+    name = "zscore"
+    is_global = True
+
+    def __init__(self, limit: float = 3.0):
+        """
+        Rejects samples with an absolute z-score (over the full record) of at least "limit".
+        """
+        self.limit = limit
+        self.reset()
+
+    def reset(self):
+        self.count, self.mean, self.m2 = 0, 0.0, 0.0
+
+    def accumulate(self, values: np.ndarray):
+        """
+        Add a chunk to the statistics of the record (Chan's parallel algorithm).
+        """
+        chunk_mean = values.mean()
+        chunk_m2 = np.sum((values - chunk_mean) ** 2)
+        delta = chunk_mean - self.mean
+        total = self.count + len(values)
+        self.mean += delta * len(values) / total
+        self.m2 += chunk_m2 + delta**2 * self.count * len(values) / total
+        self.count = total
+
+    def reject(self, values: np.ndarray) -> np.ndarray:
+        if self.count == 0:
+            # in memory, the statistics of the values themselves
+            return ~(abs(stats.zscore(values)) < self.limit)
+        zscore = (values - self.mean) / np.sqrt(self.m2 / self.count)
+        return ~(abs(zscore) < self.limit)
+
+
+class HampelRule(OutlierRule):
+
+    name = "hampel"
+
+    def __init__(self, window: int = 25, n_sigma: float = 3.0, min_sigma: float = 0.01):
+        """
+        Rejects samples deviating more than "n_sigma" robust standard deviations (1.4826
+        times the median absolute deviation) from the median of the centred window of
+        "window" samples (odd). Seasonal or tidal signals longer than the window are kept.
+        The robust standard deviation is at least "min_sigma" (mH2O), so the resolution of
+        the diver in a quiet window (a MAD of 0) does not reject every change.
+        """
+        if window < 3 or window % 2 == 0:
+            raise ValueError(f"Invalid window '{window}'. Use an odd number >= 3.")
+        self.window = window
+        self.n_sigma = n_sigma
+        self.min_sigma = min_sigma
+        self.context = window // 2
+
+    def reject(self, padded: np.ndarray) -> np.ndarray:
+        windows = sliding_window_view(padded, self.window)
+        median = _rolling_median(windows)
+        values = padded[self.context : len(padded) - self.context]
+        deviation = np.abs(values - median)
+
+        # the median absolute deviation, per block to bound the memory of the windows
+        mad = np.empty(len(windows))
+        for start in range(0, len(windows), _BLOCK_SIZE):
+            block = slice(start, start + _BLOCK_SIZE)
+            mad[block] = _rolling_median(np.abs(windows[block] - median[block, None]))
+        return deviation > self.n_sigma * np.maximum(1.4826 * mad, self.min_sigma)
+
+
+class SpikeRule(OutlierRule):
+
+    name = "spike"
+
+    def __init__(self, threshold: float = 0.5, max_width: int = 2):
+        """
+        Rejects spikes: runs of at most "max_width" samples that all depart more than
+        "threshold" (mH2O) from the sample before the run, while the sample after the run is
+        back within "threshold". Longer departures are steps (e.g. a re-hung diver) and kept.
+        """
+        self.threshold = threshold
+        self.max_width = max_width
+        self.context = max_width + 1
+
+    def reject(self, padded: np.ndarray) -> np.ndarray:
+        n = len(padded) - 2 * self.context
+        rejected = np.zeros(n, dtype=bool)
+        start = self.context
+        before = padded[start - 1 : start - 1 + n]
+        departed = np.ones(n, dtype=bool)
+        for width in range(1, self.max_width + 1):
+            # the run starts at each sample and spans "width" samples
+            departed &= (
+                np.abs(padded[start + width - 1 : start + width - 1 + n] - before)
+                > self.threshold
+            )
+            back = (
+                np.abs(padded[start + width : start + width + n] - before)
+                <= self.threshold
+            )
+            spike = departed & back
+            for offset in range(width):
+                rejected[offset:] |= spike[: n - offset]
+        return rejected
+
+
+class OutlierFilter:
+
+    def __init__(self, rules: Iterable[OutlierRule]):
+        """
+        A set of outlier rules, evaluated on a series at once or streaming on chunks.
+
+        The result is a compact uint8 mask with a bit per rule (bit i for rule i), set where
+        that rule rejected the sample. Samples with mask 0 are kept.
+
+        Attributes:
+        ----------
+        rules : Iterable[OutlierRule]
+            At most 8 rules, e.g. ZScoreRule, MinimumRule, HampelRule and SpikeRule.
+        """
+        self.rules = list(rules)
+        if len(self.rules) > 8:
+            raise ValueError("An outlier filter has at most 8 rules.")
+        self.context = max([rule.context for rule in self.local_rules], default=0)
+
+    @classmethod
+    def default(cls, zscore_limit: float = 3.0) -> "OutlierFilter":
+        """
+        The global z-score and minimum pressure (11 mH2O) rules.
+        """
+        return cls([ZScoreRule(zscore_limit), MinimumRule(11.0)])
+
+    @property
+    def local_rules(self) -> list:
+        return [rule for rule in self.rules if not rule.is_global]
+
+    def rejected_by(self, mask: np.ndarray | pd.Series) -> pd.DataFrame:
+        """
+        Decode a mask to a boolean column per rule.
+        """
+        index = mask.index if isinstance(mask, pd.Series) else None
+        mask = np.asarray(mask)
+        return pd.DataFrame(
+            {rule.name: (mask >> i) & 1 == 1 for i, rule in enumerate(self.rules)},
+            index=index,
+        )
+
+    def _local_mask(self, padded: np.ndarray) -> np.ndarray:
+        """
+        The mask of the local rules for values padded with the filter context.
+        """
+        n = len(padded) - 2 * self.context
+        mask = np.zeros(n, dtype=np.uint8)
+        for i, rule in enumerate(self.rules):
+            if rule.is_global:
+                continue
+            skip = self.context - rule.context
+            rule_padded = padded[skip : len(padded) - skip]
+            mask |= rule.reject(rule_padded).astype(np.uint8) << i
+        return mask
+
+    def global_mask(self, values: np.ndarray) -> np.ndarray:
+        """
+        The mask of the global rules, with the accumulated statistics if streamed.
+        """
+        mask = np.zeros(len(values), dtype=np.uint8)
+        for i, rule in enumerate(self.rules):
+            if rule.is_global:
+                mask |= rule.reject(values).astype(np.uint8) << i
+        return mask
+
+    def apply(self, values: np.ndarray) -> np.ndarray:
+        """
+        Return the mask of all rules for a full record.
+        """
+        values = np.asarray(values, dtype=np.float64)
+        for rule in self.rules:
+            if rule.is_global:
+                rule.reset()
+        pad = np.full(self.context, np.nan)
+        return self._local_mask(np.concatenate([pad, values, pad])) | self.global_mask(
+            values
+        )
+
+    def stream(
+        self, chunks: Iterable[pd.DataFrame], column: str
+    ) -> Iterator[tuple[pd.DataFrame, np.ndarray]]:
+        """
+        Yield the chunks of a record with the mask of the local rules on "column", equal to
+        "apply" on the full record. A chunk is yielded when the next chunk provides its right
+        context. Global rules accumulate their statistics, apply them with "global_mask"
+        after the last chunk.
+        """
+        for rule in self.rules:
+            if rule.is_global:
+                rule.reset()
+        left = np.full(self.context, np.nan)
+        pending = None
+        for chunk in chunks:
+            if chunk.empty:
+                continue
+            values = chunk[column].to_numpy(dtype=np.float64)
+            for rule in self.rules:
+                if rule.is_global:
+                    rule.accumulate(values)
+            if pending is not None:
+                padded = np.concatenate(
+                    [left, pending[column].to_numpy(dtype=np.float64), values]
+                )
+                # only the right context of the pending chunk is needed
+                padded = padded[: len(left) + len(pending) + self.context]
+                if len(padded) - len(left) - len(pending) < self.context:
+                    # a short chunk, wait for more context
+                    pending = pd.concat([pending, chunk])
+                    continue
+                yield pending, self._local_mask(padded)
+                previous = np.concatenate(
+                    [left, pending[column].to_numpy(dtype=np.float64)]
+                )
+                left = previous[len(previous) - self.context :]
+            pending = chunk
+        if pending is not None:
+            right = np.full(self.context, np.nan)
+            padded = np.concatenate(
+                [left, pending[column].to_numpy(dtype=np.float64), right]
+            )
+            yield pending, self._local_mask(padded)
@@ -1,83 +1,690 @@
+import codecs
+import os
+import re
+from collections.abc import Iterator
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
 from pathlib import Path
+from typing import BinaryIO
 
 import chardet
 import numpy as np
 import pandas as pd
 
+from .cache import ReaderCache, file_fingerprint
+from .helper_functions import check_float_dtype
 
-def read_diver(path: str | Path) -> pd.DataFrame:
-    df = pd.read_csv(
-        path,
-        usecols=[0, 1, 2],
-        names=["date", "diver_pressure (cmH2O)", "temperature (degC)"],
+DIVEROFFICE_ENCODING = "ISO-8859-1"
+DIVEROFFICE_BLANK = "     "
+DIVEROFFICE_FOOTER = "END OF DATA FILE"
+DIVEROFFICE_DATE_FORMAT = "%Y/%m/%d %H:%M:%S"
+EC_INDEX_COLUMN = "Sample number"
+EC_COLUMN = "Electrical Conductivity[ÂµS/cm]"
+_DIVEROFFICE_TIMESTAMP = re.compile(rb"^\s*\d{4}/\d{2}/\d{2} \d{2}:\d{2}:\d{2}")
+_TIMESTAMP_DIGIT_COLUMNS = [0, 1, 2, 3, 5, 6, 8, 9, 11, 12, 14, 15, 17, 18]
+_TIMESTAMP_SEPARATOR_COLUMNS = [4, 7, 10, 13, 16, 19]
+_TIMESTAMP_SEPARATORS = np.frombuffer(b"// ::\x00", dtype=np.uint8)
+_DAYS_IN_MONTH = np.array([0, 31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31])
+_ENCODINGS = {}
+_DIVER_COLUMNS = ["date", "diver_pressure (cmH2O)", "temperature (degC)"]
+
+
+def _find_data_start(path: str | Path, max_header_lines: int = 500) -> int:
+    """
+    Return the number of header lines preceding the data block of a DiverOffice csv-file.
+
+    The data block starts at the first line after the "[Data]" marker that begins with a
+    timestamp. Files without a "[Data]" marker are scanned for the first timestamp line.
+    """
+    first_timestamp = None
+    in_data = False
+    with open(path, "rb") as f:
+        for i, line in enumerate(f):
+            if i >= max_header_lines:
+                break
+            if line.strip().lower() == b"[data]":
+                in_data = True
+            elif _DIVEROFFICE_TIMESTAMP.match(line):
+                if in_data:
+                    return i
+                if first_timestamp is None:
+                    first_timestamp = i
+    if first_timestamp is not None:
+        return first_timestamp
+    raise ValueError(f"Could not find the start of the data block in '{path}'")
+
+
+def _find_footer_line(path: str | Path, blocksize: int = 2**20) -> int | None:
+    """
+    Return the line number of the closing footer line of a DiverOffice csv-file, or None
+    if the file has no footer.
+    """
+    with open(path, "rb") as f:
+        size = f.seek(0, 2)
+        f.seek(max(size - 512, 0))
+        tail = f.read()
+        position = tail.rfind(DIVEROFFICE_FOOTER.encode())
+        if position < 0:
+            return None
+
+        footer_offset = size - len(tail) + position
+        f.seek(0)
+        n_lines = 0
+        while f.tell() < footer_offset:
+            n_lines += f.read(min(blocksize, footer_offset - f.tell())).count(b"\n")
+    return n_lines
+
+
+def _diveroffice_csv_options(path: str | Path, names: list[str], engine: str) -> dict:
+    """
+    Return the pandas.read_csv keyword arguments to parse the data block of a DiverOffice
+    csv-file into raw values (cmH2O), blank fields are converted to NaN during parsing.
+    """
+    if engine not in ("c", "pyarrow", "python"):
+        raise ValueError(f"Invalid engine '{engine}'. Use 'c', 'pyarrow' or 'python'.")
+
+    options = dict(
+        usecols=list(range(len(names))),
+        names=names,
+        header=None,
         decimal=",",
-        skiprows=52,
+        skiprows=_find_data_start(path),
         delimiter=";",
-        encoding="ISO-8859-1",
-        engine="python",
+        encoding=DIVEROFFICE_ENCODING,
+        na_values=[DIVEROFFICE_BLANK],
+        dtype={name: "float64" for name in names[1:]},
+        engine=engine,
     )
-    df = df[:-1].replace("     ", np.nan)
-    df["diver_pressure (mH2O)"] = pd.to_numeric(df["diver_pressure (cmH2O)"]) / 100
-    df = df.drop(columns=["diver_pressure (cmH2O)"])
-    df["temperature (degC)"] = pd.to_numeric(df["temperature (degC)"])
-    df["date"] = pd.to_datetime(df["date"], format="%Y/%m/%d %H:%M:%S")
-    df = df.set_index("date")
+    if engine == "c":
+        options["float_precision"] = "round_trip"
+    elif engine == "pyarrow":
+        # the one-field footer line is skipped as a bad line by pyarrow
+        options["on_bad_lines"] = "skip"
+    return options
+
+
+def _decode_timestamp_bytes(
+    chars: np.ndarray, terminator: int
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Decode DiverOffice timestamps ("%Y/%m/%d %H:%M:%S") from a (n, 20) uint8 array of raw
+    bytes with NumPy arithmetic, the 20th byte of each row must equal "terminator".
+
+    Returns the datetime64[ns] values and a mask of the rows that match the format
+    (separators, digits and valid dates), values of other rows are undefined.
+    """
+    separators = _TIMESTAMP_SEPARATORS.copy()
+    separators[-1] = terminator
+    valid = (chars[:, _TIMESTAMP_SEPARATOR_COLUMNS] == separators).all(1)
+
+    # non-digits wrap around to values >= 10 in uint8
+    digits = chars[:, _TIMESTAMP_DIGIT_COLUMNS] - np.uint8(ord("0"))
+    valid &= (digits < 10).all(1)
+
+    # century, year, month, day, hour, minute and second as two-digit numbers
+    pairs = digits[:, 0::2] * np.uint8(10) + digits[:, 1::2]
+    year = pairs[:, 0].astype(np.int64) * 100 + pairs[:, 1]
+    month, day, hour, minute, second = pairs[:, 2:].astype(np.int64).T
+    valid &= (month >= 1) & (month <= 12) & (hour < 24) & (minute < 60) & (second < 60)
+    # years that overflow datetime64[ns] are left to (and reported by) pandas
+    valid &= (year > 1677) & (year < 2262)
+
+    leap_year = (year % 4 == 0) & ((year % 100 != 0) | (year % 400 == 0))
+    days_in_month = _DAYS_IN_MONTH[np.clip(month, 0, 12)] + (leap_year & (month == 2))
+    valid &= (day >= 1) & (day <= days_in_month)
+
+    # days since 1970-01-01 of the proleptic Gregorian calendar (Hinnant's days_from_civil)
+    year = year - (month <= 2)
+    era = year // 400
+    year_of_era = year - era * 400
+    day_of_year = (153 * (month + np.where(month > 2, -3, 9)) + 2) // 5 + day - 1
+    day_of_era = year_of_era * 365 + year_of_era // 4 - year_of_era // 100 + day_of_year
+    days = era * 146097 + day_of_era - 719468
+
+    seconds = (days * 24 + hour) * 3600 + minute * 60 + second
+    dates = (seconds * 1_000_000_000).view("datetime64[ns]")
+    return dates, valid
+
+
+def _decode_timestamps(values: np.ndarray) -> np.ndarray:
+    """
+    Decode an array of DiverOffice timestamp strings to datetime64[ns].
+
+    Rows that do not match the format are parsed by pandas, which raises for malformed
+    timestamps and returns NaT for NaN.
+    """
+    try:
+        chars = values.astype("S20").view(np.uint8).reshape(-1, 20)
+    except (UnicodeEncodeError, ValueError):
+        return pd.to_datetime(values, format=DIVEROFFICE_DATE_FORMAT).to_numpy()
+
+    dates, valid = _decode_timestamp_bytes(chars, terminator=0)
+    if not valid.all():
+        invalid = ~valid
+        dates[invalid] = pd.to_datetime(
+            values[invalid], format=DIVEROFFICE_DATE_FORMAT
+        ).to_numpy()
+    return dates
+
+
+def _read_timestamp_bytes(path: str | Path, skiprows: int) -> np.ndarray:
+    """
+    Return the first 20 bytes of every data line of a DiverOffice csv-file as a (n, 20)
+    uint8 array, skipping "skiprows" header lines, blank lines and the closing footer line.
+    """
+    size = os.path.getsize(path)
+    buffer = np.zeros(size + 24, dtype=np.uint8)
+    with open(path, "rb") as f:
+        f.readinto(memoryview(buffer)[:size])
+    data = buffer[:size]
+
+    starts = np.concatenate([[0], np.flatnonzero(data == ord("\n")) + 1])
+    starts = starts[skiprows:]
+    starts = starts[starts < size]
+    first = data[starts]
+    starts = starts[(first != ord("\n")) & (first != ord("\r"))]
+
+    footer = DIVEROFFICE_FOOTER.encode()
+    if len(starts) and data[starts[-1] : starts[-1] + len(footer)].tobytes() == footer:
+        starts = starts[:-1]
+
+    # an (unaligned) 8-byte word at every offset gathers 24 bytes per line in 3 steps,
+    # the zero padding keeps the words of short last lines in bounds
+    words = np.ndarray(shape=(size + 17,), dtype="<u8", buffer=buffer, strides=(1,))
+    chars = np.stack([words[starts], words[starts + 8], words[starts + 16]], axis=1)
+    return chars.view(np.uint8)[:, :20]
+
+
+def _parse_diveroffice_block(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Drop the closing footer line (if present) and set the parsed dates as index.
+    """
+    if len(df) and str(df["date"].iat[-1]).startswith(DIVEROFFICE_FOOTER):
+        df = df.iloc[:-1]
+
+    dates = _decode_timestamps(df["date"].to_numpy())
+    df = df.drop(columns=["date"])
+    df.index = pd.DatetimeIndex(dates, name="date")
     return df
 
 
-def read_barometer(path: str | Path) -> pd.DataFrame:
-    df = pd.read_csv(
-        path,
-        usecols=[0, 1],
-        names=["date", "air_pressure (cmH2O)"],
-        decimal=",",
-        skiprows=52,
-        delimiter=";",
-        encoding="ISO-8859-1",
-        engine="python",
-    )
-    df = df[:-1].replace("     ", np.nan)
-    df["air_pressure (mH2O)"] = pd.to_numeric(df["air_pressure (cmH2O)"]) / 100
+def _read_diveroffice(
+    path: str | Path, names: list[str], engine: str = "c"
+) -> pd.DataFrame:
+    """
+    Parse the data block of a DiverOffice csv-file into a DataFrame with raw values (cmH2O).
+    """
+    options = _diveroffice_csv_options(path, names, engine)
+
+    # decode the timestamps from the raw bytes, pandas only parses the values (the
+    # multi-threaded pyarrow parser is faster parsing the date column itself)
+    if engine != "pyarrow":
+        chars = _read_timestamp_bytes(path, options["skiprows"])
+        dates, valid = _decode_timestamp_bytes(chars, terminator=ord(";"))
+        if valid.all():
+            values_options = options | {"usecols": names[1:], "nrows": len(dates)}
+            df = pd.read_csv(path, **values_options)
+            if len(df) == len(dates):
+                df.index = pd.DatetimeIndex(dates, name="date")
+                return df
+
+    df = pd.read_csv(path, **options)
+    return _parse_diveroffice_block(df)
+
+
+def _convert_diver(df: pd.DataFrame, dtype: str = "float64") -> pd.DataFrame:
+    df["diver_pressure (mH2O)"] = df["diver_pressure (cmH2O)"] / 100
+    df = df.drop(columns=["diver_pressure (cmH2O)"])
+    return df.astype(check_float_dtype(dtype), copy=False)
+
+
+def read_diver(
+    path: str | Path,
+    engine: str = "c",
+    cache: ReaderCache | None = None,
+    dtype: str = "float64",
+) -> pd.DataFrame:
+    """
+    Open csv-file (export by diver office) with diver data and convert pressure to mH2O.
+
+    The start of the data block is derived from the file itself. Use "engine" to select
+    the pandas csv-parser ("c", "pyarrow" or the slow "python" parser). If a "cache" is
+    given, an unchanged file is loaded from the cache instead of parsed. Values are parsed
+    in float64 and returned as "dtype" ("float64" or "float32").
+    """
+    if cache is not None:
+        return cache.get_or_read(read_diver, path, engine=engine, dtype=dtype)
+
+    df = _read_diveroffice(path, _DIVER_COLUMNS, engine=engine)
+    return _convert_diver(df, dtype)
+
+
+def iter_diver_chunks(
+    path: str | Path, chunksize: int = 100_000, dtype: str = "float64"
+) -> Iterator[pd.DataFrame]:
+    """
+    Iterate over a csv-file (export by diver office) with diver data in chunks of at most
+    "chunksize" rows.
+
+    Each chunk equals the corresponding rows of "read_diver": pressure in mH2O, temperature
+    in degC and a DatetimeIndex. Only one chunk is held in memory at a time.
+    """
+    options = _diveroffice_csv_options(path, _DIVER_COLUMNS, engine="c")
+    footer_line = _find_footer_line(path)
+    if footer_line is not None:
+        # a last chunk with only the one-field footer line cannot be parsed
+        options["nrows"] = footer_line - options["skiprows"]
+
+    with pd.read_csv(path, chunksize=chunksize, **options) as reader:
+        for chunk in reader:
+            chunk = _convert_diver(_parse_diveroffice_block(chunk), dtype)
+            if len(chunk):
+                yield chunk
+
+
+def read_divers(
+    directory: str | Path,
+    well_ids: list[str] | None = None,
+    workers: int | None = None,
+    engine: str = "c",
+    as_frame: bool = False,
+    cache: ReaderCache | None = None,
+    dtype: str = "float64",
+    executor: str = "process",
+) -> tuple[dict[str, pd.DataFrame] | pd.DataFrame, dict[str, str]]:
+    """
+    Open the diver csv-files ("{well_id}.csv") of multiple wells in parallel.
+
+    Files are parsed with "read_diver" on a pool of "workers" processes or threads (defaults
+    to the number of cpu's, 1 parses in the current process). A file that fails to parse
+    does not abort the other files, its error is reported in the returned failures. If a
+    "cache" is given, cached files are loaded in the current process and only changed files
+    are parsed.
+
+    Worker processes are spawned on Windows: each worker imports the calling script again,
+    so a script calling "read_divers" with the process pool must run it under
+    'if __name__ == "__main__":'. Without that guard the pool breaks and a
+    "BrokenProcessPool" error is raised. Scripts run as cells use 'executor="thread"'.
+
+    Parameters
+    ----------
+    directory : str | Path
+        The directory with the diver csv-files.
+    well_ids : list[str], optional
+        The wells to read. Defaults to all csv-files in "directory".
+    workers : int, optional
+        The number of worker processes or threads.
+    engine : str, optional
+        The pandas csv-parser passed to "read_diver". Defaults to "c".
+    as_frame : bool, optional
+        Return a single long-format DataFrame with a (well_id, date) MultiIndex instead of a
+        dictionary of DataFrames. Defaults to "False".
+    cache : ReaderCache, optional
+        The cache to load unchanged files from and store parsed files in.
+    dtype : str, optional
+        The float dtype of the returned values ("float64" or "float32"). Defaults to
+        "float64".
+    executor : str, optional
+        Parse on a pool of "process"es (default) or "thread"s.
+
+    Returns
+    -------
+    tuple[dict[str, pd.DataFrame] | pd.DataFrame, dict[str, str]]
+        The diver data per well and the error message per well that failed.
+    """
+    if executor not in ("process", "thread"):
+        raise ValueError(f"Invalid executor '{executor}'. Use 'process' or 'thread'.")
+    directory = Path(directory)
+    if well_ids is None:
+        well_ids = sorted(path.stem for path in directory.glob("*.csv"))
+    paths = {well_id: directory / f"{well_id}.csv" for well_id in well_ids}
+    kwargs = dict(engine=engine, dtype=dtype)
+
+    divers, failures, fingerprints = {}, {}, {}
+    for well_id, path in paths.items():
+        if not path.exists():
+            failures[well_id] = f"FileNotFoundError: '{path}' does not exist"
+        elif cache is not None:
+            diver = cache.get(read_diver, path, **kwargs)
+            if diver is None:
+                fingerprints[well_id] = file_fingerprint(path)
+            else:
+                divers[well_id] = diver
+
+    to_parse = [w for w in paths if w not in divers and w not in failures]
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = min(workers, len(to_parse))
+
+    def collect(well_id, parse):
+        try:
+            divers[well_id] = parse()
+        except BrokenProcessPool as e:
+            # not an error of the file: the workers could not start or died
+            raise BrokenProcessPool(
+                "The diver files could not be parsed in worker processes, call "
+                "'read_divers' under 'if __name__ == \"__main__\":' or use "
+                "executor='thread'."
+            ) from e
+        except Exception as e:
+            failures[well_id] = f"{type(e).__name__}: {e}"
+            return
+        if cache is not None:
+            cache.put(
+                read_diver,
+                paths[well_id],
+                divers[well_id],
+                fingerprint=fingerprints[well_id],
+                **kwargs,
+            )
+
+    if workers <= 1:
+        for well_id in to_parse:
+            collect(well_id, lambda: read_diver(paths[well_id], **kwargs))
+    else:
+        pool = ProcessPoolExecutor if executor == "process" else ThreadPoolExecutor
+        with pool(max_workers=workers) as workers_pool:
+            futures = {
+                workers_pool.submit(read_diver, paths[well_id], **kwargs): well_id
+                for well_id in to_parse
+            }
+            for future in as_completed(futures):
+                collect(futures[future], future.result)
+
+    divers = {well_id: divers[well_id] for well_id in paths if well_id in divers}
+    if as_frame:
+        divers = (
+            pd.concat(divers, names=["well_id", "date"]) if divers else pd.DataFrame()
+        )
+    return divers, failures
+
+
+def read_barometer(
+    path: str | Path,
+    engine: str = "c",
+    cache: ReaderCache | None = None,
+    dtype: str = "float64",
+) -> pd.DataFrame:
+    """
+    Open csv-file (export by diver office) with barometer data and convert pressure to mH2O.
+
+    The start of the data block is derived from the file itself. Use "engine" to select
+    the pandas csv-parser ("c", "pyarrow" or the slow "python" parser). If a "cache" is
+    given, an unchanged file is loaded from the cache instead of parsed. Values are parsed
+    in float64 and returned as "dtype" ("float64" or "float32").
+    """
+    if cache is not None:
+        return cache.get_or_read(read_barometer, path, engine=engine, dtype=dtype)
+
+    df = _read_diveroffice(path, names=["date", "air_pressure (cmH2O)"], engine=engine)
+    df["air_pressure (mH2O)"] = df["air_pressure (cmH2O)"] / 100
     df = df.drop(columns=["air_pressure (cmH2O)"])
-    df["date"] = pd.to_datetime(df["date"], format="%Y/%m/%d %H:%M:%S")
-    df = df.set_index("date")
-    return df
+    return df.astype(check_float_dtype(dtype), copy=False)
 
 
-def read_ec_measurement(path: str | Path) -> pd.Series:
+def read_ec_measurement(
+    path: str | Path, cache: ReaderCache | None = None, dtype: str = "float64"
+) -> pd.Series:
     """
     Open csv-file with ec-measurements from field campaig and convert to mS/cm
     """
+    if cache is not None:
+        return cache.get_or_read(read_ec_measurement, path, dtype=dtype)
+
     df = pd.read_csv(
         path,
         decimal=",",
         skiprows=19,
         delimiter=";",
         encoding="ISO-8859-1",
-        engine="python",
-        index_col="Sample number",
+        usecols=[EC_INDEX_COLUMN, EC_COLUMN],
+        float_precision="round_trip",
+        index_col=EC_INDEX_COLUMN,
     )
 
-    df["Electrical Conductivity[mS/cm]"] = df["Electrical Conductivity[ÂµS/cm]"] / 1000
+    df["Electrical Conductivity[mS/cm]"] = df[EC_COLUMN] / 1000
 
-    return df["Electrical Conductivity[mS/cm]"]
+    return df["Electrical Conductivity[mS/cm]"].astype(check_float_dtype(dtype))
 
 
-def read_gw_measurements(path: str | Path):
+def property_changes_from_metadata(metadata: pd.Series | pd.DataFrame) -> pd.DataFrame:
+    """
+    Collect the dated ztop and cable length changes from the well metadata (Excel) into a
+    table for "MonitoringWell.apply_property_changes".
+
+    The metadata holds the changes in numbered columns "datum_aanpassing_{i}" ("DD-MM-YYYY"),
+    "Top_PB_{i} (m NAP)" and "kabellengte_{i} (m)". For a metadata row (one well) the
+    changes are indexed by date, for the full metadata by (well, date). The changes of a
+    well should have increasing dates in the order of their numbers, otherwise a
+    ValueError is raised.
+    """
+    if isinstance(metadata, pd.DataFrame):
+        tables = {
+            well_id: property_changes_from_metadata(row)
+            for well_id, row in metadata.iterrows()
+        }
+        return pd.concat(tables, names=[metadata.index.name, "date"])
+
+    numbers = sorted(
+        int(match.group(1))
+        for key in metadata.index
+        if (match := re.fullmatch(r"datum_aanpassing_(\d+)", str(key)))
+    )
+    rows = []
+    for i in numbers:
+        date = metadata[f"datum_aanpassing_{i}"]
+        if pd.isna(date):
+            continue
+        rows.append(
+            {
+                "date": pd.to_datetime(date, format="%d-%m-%Y"),
+                "ztop (m NAP)": metadata.get(f"Top_PB_{i} (m NAP)", np.nan),
+                "cable_length (m)": metadata.get(f"kabellengte_{i} (m)", np.nan),
+            }
+        )
+    table = pd.DataFrame(
+        rows, columns=["date", "ztop (m NAP)", "cable_length (m)"], dtype=object
+    )
+    table = table.astype({"ztop (m NAP)": "float64", "cable_length (m)": "float64"})
+    table["date"] = pd.to_datetime(table["date"])
+    if not table["date"].is_monotonic_increasing or table["date"].duplicated().any():
+        raise ValueError(
+            f"The change dates of well '{metadata.name}' are not in chronological order or "
+            f"not unique: {', '.join(table['date'].dt.strftime('%d-%m-%Y'))}."
+        )
+    return table.set_index("date")
+
+
+def _campaign_date(path: Path) -> pd.Timestamp:
+    return pd.to_datetime(path.stem.removeprefix("handmetingen_"), format="%d%m%Y")
+
+
+def read_ec_campaigns(
+    directory: str | Path,
+    dates: list[str] | None = None,
+    workers: int | None = None,
+    long: bool = False,
+    dtype: str = "float64",
+) -> pd.DataFrame | pd.Series:
+    """
+    Open all csv-files with ec-measurements ("handmetingen_{ddmmyyyy}.csv") of the field
+    campaigns in a directory and combine them into one well x date matrix (in mS/cm).
+
+    The (small) files are parsed on a pool of "workers" threads and the matrix is allocated
+    once, wells are ordered by first appearance and dates chronologically. Missing
+    measurements are NaN.
+
+    Parameters
+    ----------
+    directory : str | Path
+        The directory with the csv-files of the field campaigns.
+    dates : list[str], optional
+        The campaign dates to read ("ddmmyyyy"). Defaults to all campaigns in "directory".
+    workers : int, optional
+        The number of threads. Defaults to the number of cpu's.
+    long : bool, optional
+        Return a long table (Series with a (well, date) MultiIndex, without missing
+        measurements) instead of the matrix. Defaults to "False".
+    dtype : str, optional
+        The float dtype of the values ("float64" or "float32"). Defaults to "float64".
+
+    Returns
+    -------
+    pd.DataFrame | pd.Series
+        The EC measurements with the wells as index and campaign dates as columns.
+    """
+    directory = Path(directory)
+    if dates is None:
+        paths = sorted(directory.glob("handmetingen_*.csv"), key=_campaign_date)
+    else:
+        paths = [directory / f"handmetingen_{date}.csv" for date in dates]
+        paths = sorted(paths, key=_campaign_date)
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        campaigns = list(
+            executor.map(lambda path: read_ec_measurement(path, dtype=dtype), paths)
+        )
+
+    wells = pd.Index(
+        pd.unique(np.concatenate([c.index.to_numpy() for c in campaigns] or [[]])),
+        name=EC_INDEX_COLUMN,
+    )
+    values = np.full((len(wells), len(paths)), np.nan, dtype=check_float_dtype(dtype))
+    for i, campaign in enumerate(campaigns):
+        values[wells.get_indexer(campaign.index), i] = campaign.to_numpy()
+
+    matrix = pd.DataFrame(
+        values, index=wells, columns=[_campaign_date(path) for path in paths]
+    )
+    if long:
+        return (
+            matrix.stack(future_stack=True)
+            .dropna()
+            .rename_axis([EC_INDEX_COLUMN, "date"])
+        )
+    return matrix
+
+
+# byte order marks, the utf-32 marks first as they start with the utf-16 marks
+_BOMS = (
+    (codecs.BOM_UTF32_LE, "utf-32"),
+    (codecs.BOM_UTF32_BE, "utf-32"),
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+)
+# control characters (unicode category Cc) other than tabs and line breaks
+_CONTROL_CHARACTERS = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f\x7f-\x9f]")
+# the single-byte encodings of DiverOffice and Excel exports, read as cp1252
+_LATIN_ENCODINGS = ("ascii", "utf-8", "windows-1252", "iso-8859-1", "iso-8859-15")
+
+
+def _decodes_as(f: BinaryIO, encoding: str, blocksize: int = 2**20) -> int | None:
+    """
+    Strictly decode a binary file incrementally, return None if it is valid in "encoding"
+    and the offset of the first invalid byte otherwise.
+    """
+    decoder = codecs.getincrementaldecoder(encoding)(errors="strict")
+    offset = 0
+    f.seek(0)
+    try:
+        while block := f.read(blocksize):
+            decoder.decode(block)
+            offset += len(block)
+        decoder.decode(b"", final=True)
+    except UnicodeDecodeError as e:
+        return offset + e.start
+    return None
+
+
+def _is_text(sample: bytes, encoding: str) -> bool:
+    """
+    Whether a sample decodes in "encoding" to text without control characters (other than
+    tabs and line breaks), the last bytes may be a cut-off character.
+    """
+    text = sample.decode(encoding, errors="ignore")
+    return _CONTROL_CHARACTERS.search(text) is None
+
+
+def _detect_encoding(path: str | Path, sample_size: int) -> str:
+    """
+    Detect the text encoding of a file. A byte order mark decides the encoding, otherwise a
+    strict incremental decode as utf-8 is tried first. As cp1252 decodes almost any bytes,
+    it is only used when chardet agrees on a bounded sample (the start of the file and the
+    bytes around the first byte that is not valid utf-8) or is unsure, and the whole file
+    decodes strictly to text without control characters (e.g. no NUL bytes of utf-16
+    without a byte order mark). Raises a ValueError if no encoding passes, instead of
+    returning mojibake.
+    """
+    with open(path, "rb") as f:
+        head = f.read(sample_size)
+        for bom, encoding in _BOMS:
+            if head.startswith(bom):
+                return encoding
+
+        invalid_position = _decodes_as(f, "utf-8")
+        if invalid_position is None and _is_text(head, "utf-8"):
+            return "utf-8"
+        sample = head
+        if invalid_position is not None:
+            f.seek(max(invalid_position - sample_size // 2, len(head)))
+            sample = head + f.read(sample_size)
+
+        detected = chardet.detect(sample)
+        encoding = (detected["encoding"] or "").lower()
+        if encoding in _LATIN_ENCODINGS or detected["confidence"] < 0.5:
+            candidates = ("cp1252", DIVEROFFICE_ENCODING)
+        else:
+            candidates = (encoding,)
+        for encoding in candidates:
+            if _is_text(sample, encoding) and _decodes_as(f, encoding) is None:
+                return encoding
+    raise ValueError(f"Could not determine the text encoding of '{path}'.")
+
+
+def detect_encoding(
+    path: str | Path, sample_size: int = 2**16, cache: ReaderCache | None = None
+) -> str:
+    """
+    Return the text encoding of a file. The detected encoding is remembered per file
+    fingerprint (path, size and mtime) for this session, and across sessions if a "cache"
+    is given, so an unchanged file is not inspected again.
+    """
+    fingerprint = file_fingerprint(path, content_hash=False)
+    key = f"{fingerprint['path']}|{fingerprint['size']}|{fingerprint['mtime_ns']}"
+
+    encoding = _ENCODINGS.get(key)
+    if encoding is None and cache is not None:
+        encoding = cache.get_encoding(key)
+    if encoding is None:
+        encoding = _detect_encoding(path, sample_size)
+        if cache is not None:
+            cache.put_encoding(key, encoding)
+    _ENCODINGS[key] = encoding
+    return encoding
+
+
+def read_gw_measurements(path: str | Path, cache: ReaderCache | None = None):
     """
     Open csv-file (export by diver office) with groundwater manual measurement from field campaign.
     """
-    with open(
-        path,
-        "rb",
-    ) as f:
-        enc = chardet.detect(f.read())
+    if cache is not None:
+        df = cache.get(read_gw_measurements, path)
+        if df is None:
+            fingerprint = file_fingerprint(path)
+            df = _read_gw_measurements(path, detect_encoding(path, cache=cache))
+            cache.put(read_gw_measurements, path, df, fingerprint=fingerprint)
+        return df
+
+    return _read_gw_measurements(path, detect_encoding(path))
+
 
+def _read_gw_measurements(path: str | Path, encoding: str) -> pd.DataFrame:
     df = pd.read_csv(
         path,
         skiprows=1,
         delimiter=";",
-        encoding=enc["encoding"],
+        encoding=encoding,
         names=["Peilbuis", "datetime", "head (m-ztop)"],
     )
 
@@ -1,9 +1,15 @@
 import matplotlib.pyplot as plt
-import pandas as pd
 from .diver_processing import MonitoringWell
 
 
-def plot_groundwater(monitoring_well: MonitoringWell, freq: str = "1D"):
+def plot_groundwater(
+    monitoring_well: MonitoringWell, freq: str | None = None, envelope: bool = False
+):
+    """
+    Plot the heads of a well (means per period "freq" of the time-series pyramid, by default
+    the coarsest level that matches the width of the axes in pixels) and the groundwater
+    measurements. With "envelope", the minimum and maximum per period are shaded.
+    """
     fig, ax = plt.subplots(
         nrows=1,
         ncols=1,
@@ -12,17 +18,29 @@ def plot_groundwater(monitoring_well: MonitoringWell, freq: str = "1D"):
         sharey=True,
         sharex=True,
     )
-    monitoring_well.gw_measurements.plot(ax=ax, color="red", style=".")
-
-    monitoring_well.point_water_head.groupby(pd.Grouper(freq=freq)).mean().plot(
-        ax=ax, color="black", lw=0.4
-    )
-    monitoring_well.fresh_water_head.groupby(pd.Grouper(freq=freq)).mean().plot(
-        ax=ax, color="darkblue", lw=0.4
-    )
-    monitoring_well.fresh_water_ref_head.groupby(pd.Grouper(freq=freq)).mean().plot(
-        ax=ax, color="darkgreen", lw=0.4
+    monitoring_well.gw_measurements[["head (m NAP)"]].plot(
+        ax=ax, color="red", style="."
     )
+    if freq is None:
+        freq = monitoring_well.pyramid_level(ax.get_window_extent().width)
+
+    # the (cached) aggregates of the well, at the plotting frequency
+    for name, color in [
+        ("point_water_head", "black"),
+        ("fresh_water_head", "darkblue"),
+        ("fresh_water_ref_head", "darkgreen"),
+    ]:
+        aggregate = monitoring_well.aggregate(name, freq)
+        aggregate["mean"].to_frame(f"{name} (m NAP)").plot(ax=ax, color=color, lw=0.4)
+        if envelope and freq not in ("h", "1h"):
+            ax.fill_between(
+                aggregate.index,
+                aggregate["min"],
+                aggregate["max"],
+                color=color,
+                alpha=0.2,
+                lw=0,
+            )
     ax.set_ylim(-1.2, 1.2)
     ax.set_ylabel("(m NAP)")
     plt.legend(frameon=False, fontsize=8)
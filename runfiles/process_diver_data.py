@@ -1,4 +1,5 @@
 # %%
+from importlib.util import find_spec
 from pathlib import Path
 
 import pandas as pd
@@ -15,6 +16,12 @@ path_metadata = project_dir / "01_metadata/peilbuizen_metadata.xlsx"
 path_baro = diver_dir / "diverdata/KNMI 240 Schiphol.csv"
 path_gw_measurements = diver_dir / "Manual Measurements-IJmuiden.csv"
 
+# cache parsed files, unchanged files are not parsed again on the next run (the cache
+# stores Arrow files, it is only used when pyarrow is installed)
+cache = gij.ReaderCache(diver_dir / "cache") if find_spec("pyarrow") else None
+# process the wells incrementally, reusing the heads of the previous run
+incremental = False
+
 metadata = pd.read_excel(path_metadata, index_col=0)
 # % open ec field measurements
 campaign_dates = [
@@ -27,19 +34,12 @@ campaign_dates = [
     "22052024",
     "02122024",
 ]
-ec_measurements = pd.DataFrame()
-for date in campaign_dates:
-    path = measurements_dir / f"handmetingen_{date}.csv"
-
-    df = gij.read_ec_measurement(path)
-    date = pd.to_datetime(date, format="%d%m%Y")
-
-    ec_measurements[date] = df
+ec_measurements = gij.read_ec_campaigns(measurements_dir, dates=campaign_dates)
 
 # % open groundwater hand measurements
-gw_measurements = gij.read_gw_measurements(path_gw_measurements)
+gw_measurements = gij.read_gw_measurements(path_gw_measurements, cache=cache)
 gw_measurements.index = [rename_well(name) for name in gw_measurements.index.tolist()]
-project_baro = gij.read_barometer(path_baro)
+project_baro = gij.read_barometer(path_baro, cache=cache)
 
 # %%
 start_date = "20-05-2022"
@@ -47,6 +47,19 @@ end_date = "05-12-2024"
 
 well_ids = metadata.index.to_list()
 # well_ids = ["BL-01_2"]
+
+# read all diver files in parallel, files that can not be read are reported (threads, as
+# worker processes would re-run this script on Windows)
+divers, failures = gij.read_divers(
+    diver_dir / "diverdata",
+    well_ids=[w for w in well_ids if isinstance(metadata.loc[w, "DiverID"], str)],
+    cache=cache,
+    executor="thread",
+)
+for well_id, error in failures.items():
+    print(f"Could not read diver data of {well_id}: {error}")
+
+monitoring_wells = []
 for well_id in well_ids:
     print(well_id)
 
@@ -65,8 +78,9 @@ for well_id in well_ids:
     else:
         continue
 
-    path_diver = diver_dir.joinpath("diverdata", f"{well_id}.csv")
-    diver = gij.read_diver(path_diver)
+    if well_id not in divers:
+        continue
+    diver = divers[well_id]
 
     monitoring_well = gij.MonitoringWell(
         well_id=well_id,
@@ -86,22 +100,9 @@ for well_id in well_ids:
         monitoring_well.add_diverdata(diver)
 
     # update well properties (some wells were shortened or/and extend several times)
-    for i in [1, 2, 3]:  # Adjust the range as needed
-        date_key = f"datum_aanpassing_{i}"
-        cable_length_key = f"kabellengte_{i} (m)"
-        top_pb_key = f"Top_PB_{i} (m NAP)"
-
-        if not pd.isna(metadata_well[date_key]):
-            if not pd.isna(metadata_well[cable_length_key]):
-                monitoring_well.update_properties(
-                    new_cable_length=metadata_well[cable_length_key],
-                    date_correction=metadata_well[date_key],
-                )
-            if not pd.isna(metadata_well[top_pb_key]):
-                monitoring_well.update_properties(
-                    new_ztop=metadata_well[top_pb_key],
-                    date_correction=metadata_well[date_key],
-                )
+    monitoring_well.apply_property_changes(
+        gij.property_changes_from_metadata(metadata_well)
+    )
 
     # add ec measurements to calculate water density
     ec_measurements_well = ec_measurements.loc[well_id]
@@ -113,49 +114,66 @@ for well_id in well_ids:
     gw_measurements_well = gw_measurements.loc[well_id].set_index("datetime")
     monitoring_well.add_gw_measurements(gw_measurements_well)
 
-    # calculate water level.
-    if well_id in [
-        "Z13PB600_1",
-        "B25A0942_3",
-        "RWS-B27_1",
-        "C_1",
-        "C_2",
-        "C_3",
-        "BK-8.25_2",
-        "BL-01_1",
-    ]:
-        monitoring_well.barometric_compensation(
-            match_gw_measurements=True,
+    monitoring_wells.append(monitoring_well)
+
+# %% calculate water levels of all wells at once
+matched_wells = [
+    "Z13PB600_1",
+    "B25A0942_3",
+    "RWS-B27_1",
+    "C_1",
+    "C_2",
+    "C_3",
+    "BK-8.25_2",
+    "BL-01_1",
+    "D_1",
+    "B25A0942_1",
+]
+if incremental:
+    # only recompute the periods affected by new or changed data since the previous run
+    processor = gij.IncrementalProcessor(diver_dir / "state")
+    for monitoring_well in monitoring_wells:
+        processor.process(
+            monitoring_well,
+            match_gw_measurements=monitoring_well.well_id in matched_wells,
             method="penultimate",
         )
+else:
+    network = gij.MonitoringNetwork(monitoring_wells)
+    network.barometric_compensation(
+        match_gw_measurements={well_id: True for well_id in matched_wells},
+        method="penultimate",
+    )
+    network.assign_to_wells()
 
-    elif well_id in ["D_1", "B25A0942_1"]:
-        monitoring_well.barometric_compensation(
-            match_gw_measurements=True, method="penultimate"
-        )
-    else:
-        monitoring_well.barometric_compensation(match_gw_measurements=False)
-
-    if well_id == "C_2":
-        monitoring_well.drop_data(before="11-08-2022")
-
-    if well_id == "C_3":
-        monitoring_well.drop_data(before="10-10-2022")
-
-    if well_id == "Z13PB600_1":
-        monitoring_well.drop_data(between=["18-09-2023", "6-10-2023"])
+# periods to drop from the heads per well
+drop_rules = pd.DataFrame(
+    [
+        ("C_2", "before", "11-08-2022", None),
+        ("C_3", "before", "10-10-2022", None),
+        ("Z13PB600_1", "between", "18-09-2023", "6-10-2023"),
+        ("RWS-04-2_2", "between", "27-07-2022", "13-9-2022"),
+        ("RWS-04-3_1", "before", "13-9-2022", None),
+    ],
+    columns=["well_id", "kind", "date", "end_date"],
+).set_index("well_id")
 
-    if well_id == "RWS-04-2_2":
-        monitoring_well.drop_data(between=["27-07-2022", "13-9-2022"])
+for monitoring_well in monitoring_wells:
+    well_id = monitoring_well.well_id
 
-    if well_id == "RWS-04-3_1":
-        monitoring_well.drop_data(before="13-9-2022")
+    monitoring_well.apply_drop_rules(drop_rules[drop_rules.index == well_id])
 
     path_fig = rf"n:\Projects\11207500\11207510\C. Report - advise\figuren\tijdreeksen_december_2024\{well_id}.png"
-    fig = gij.plot_groundwater(monitoring_well, freq="h")
+    fig = gij.plot_groundwater(monitoring_well)
     fig.savefig(path_fig)
 
     path_csv = output_dir / f"{well_id}.csv"
     monitoring_well.export_fresh_water_head(path_csv)
 
-# %%
+# one store of the heads of all wells, read by the figure scripts
+aquifers = metadata.index.str.split("_").str[-1]
+head_store = gij.HeadStore(diver_dir / "head_store")
+head_store.write(
+    monitoring_wells,
+    attributes=metadata[["X-coord", "Y-coord"]].assign(aquifer=aquifers),
+)